@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from urllib.parse import parse_qs
 
@@ -36,6 +37,14 @@ github_sql_query = insert_or_update_template.format(
     table="users", field="github_oauth_token"
 )
 
+# Bot processes listening on this channel drop their cached copy of the token
+invalidate_sql_query = "select pg_notify('cache_invalidate', $1)"
+
+
+async def invalidate_token(db_conn: asyncpg.pool.Pool, namespace: str, user_id: int):
+    payload = json.dumps({"namespace": namespace, "key": user_id})
+    await db_conn.execute(invalidate_sql_query, payload)
+
 
 # TODO: Cache recently used jwt tokens until expiry and deny their usage
 # TODO: Serverless is stateless, hence use db caching
@@ -59,6 +68,7 @@ async def stackexchange_oauth(
     if "access_token" not in auth:
         return {k: v for k, v in auth.items() if k.startswith("error_")}
     await db_conn.execute(stack_sql_query, user_id, auth["access_token"])
+    await invalidate_token(db_conn, "stackexchange_tokens", user_id)
 
     return jinja.TemplateResponse(
         "oauth_success.html", {"request": request, "oauth_provider": "Stackexchange"}
@@ -80,6 +90,7 @@ async def github_oauth(
     )
     auth = await res.json()
     await db_conn.execute(github_sql_query, user_id, auth["access_token"])
+    await invalidate_token(db_conn, "github_tokens", user_id)
 
     return jinja.TemplateResponse(
         "oauth_success.html", {"request": request, "oauth_provider": "Github"}
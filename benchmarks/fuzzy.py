@@ -0,0 +1,392 @@
+"""
+Latency and memory of the fuzzy search functions behind rtfm and stacksites
+
+    python -m benchmarks.fuzzy record python numpy discord.py
+    python -m benchmarks.fuzzy run --output before.json
+    python -m benchmarks.fuzzy run --output after.json
+    python -m benchmarks.fuzzy compare before.json after.json
+
+record downloads the objects.inv of RTFM targets into benchmarks/fixtures, run
+benchmarks every function over the recorded inventories and synthetic corpora
+of the given sizes and saves the results, and compare flags the cases that got
+slower or use more memory than the threshold, exiting with 1 if any did.
+Queries are made from entries of each corpus the way people search: fragments,
+entries with characters left out and with typos.
+
+Recorded inventories change whenever the docs do, so they aren't committed.
+The synthetic corpora and the queries are seeded and the same on any machine,
+without fixtures only they are run. Results keep a digest of each corpus and
+compare skips the corpora that differ between the two runs.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import platform
+import random
+import string
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from bot.utils import fuzzy, rtfm
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Pair scorers are measured on this many pairs of a query and an entry
+PAIRS = 1000
+
+# Tracing allocations slows everything down a lot, peak memory and allocations
+# are only taken from this many calls of each case
+TRACED_CALLS = 5
+
+# Allocations of the tracing itself are left out of snapshots
+_TRACE_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+def synthetic_corpus(size: int, seed: int = 0) -> List[str]:
+    """Names shaped like inventory keys: dotted paths and some labels"""
+    rng = random.Random(seed)
+    syllables = [a + b for a in "bcdfghklmnprstvz" for b in "aeiou"]
+    words = list(
+        {
+            "".join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+            for _ in range(max(size // 20, 200))
+        }
+    )
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.1:
+            corpus.append(
+                "label:" + " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+            )
+        else:
+            parts = [rng.choice(words) for _ in range(rng.randint(1, 4))]
+            if rng.random() < 0.3:
+                parts[-1] = parts[-1].capitalize()
+            corpus.append(".".join(parts))
+    return corpus
+
+
+def load_fixture(path: Path) -> List[str]:
+    return list(rtfm.SphinxObjectFileReader(path.read_bytes()).parse_object_inv(""))
+
+
+def make_queries(corpus: List[str], count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        entry = rng.choice(corpus)
+        kind = rng.randrange(3)
+        if kind == 0:
+            start = rng.randrange(len(entry))
+            query = entry[start : start + rng.randint(3, 12)]
+        elif kind == 1:
+            query = "".join(c for c in entry if rng.random() < 0.7)
+        else:
+            chars = list(entry)
+            chars[rng.randrange(len(chars))] = rng.choice(string.ascii_lowercase)
+            query = "".join(chars)
+        queries.append(query or entry)
+    return queries
+
+
+def percentile(values: List[float], percent: float) -> float:
+    return sorted(values)[max(int(len(values) * percent / 100) - 1, 0)]
+
+
+def corpus_digest(corpus: List[str]) -> str:
+    return hashlib.sha256("\n".join(corpus).encode()).hexdigest()[:16]
+
+
+def measure(calls: List[Callable[[], Any]]) -> Dict[str, float]:
+    """
+    Time each call, then run a few again traced to get their peak memory and
+    the blocks they left allocated, from a snapshot taken before and after
+    """
+    latencies = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    peaks = []
+    blocks = []
+    tracemalloc.start()
+    try:
+        for call in calls[:TRACED_CALLS]:
+            tracemalloc.clear_traces()
+            before = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            result = call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            after = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+            # The result and anything the call cached or leaked
+            blocks.append(
+                sum(
+                    stat.count_diff
+                    for stat in after.compare_to(before, "filename")
+                    if stat.count_diff > 0
+                )
+            )
+            del result, before, after
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "calls": len(calls),
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "peak_kib": max(peaks) / 1024,
+        "alloc_blocks": max(blocks),
+    }
+
+
+def retained(build: Callable[[], Any]) -> Dict[str, float]:
+    """Time to build a search structure, then the memory it keeps"""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        built = build()
+        size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+    return {
+        "calls": 1,
+        "mean_ms": elapsed * 1000,
+        "p50_ms": elapsed * 1000,
+        "p95_ms": elapsed * 1000,
+        "p99_ms": elapsed * 1000,
+        "max_ms": elapsed * 1000,
+        "peak_kib": peak / 1024,
+        "retained_kib": size / 1024,
+    }
+
+
+def encoded_choices(corpus: List[str]) -> fuzzy.ChoiceSet:
+    # Encoded up front like a choice set searched many times
+    choices = fuzzy.ChoiceSet(corpus)
+    choices.counters()
+    choices.sorted_counters()
+    return choices
+
+
+def bench_corpus(name: str, corpus: List[str], runs: int) -> List[Dict[str, Any]]:
+    queries = make_queries(corpus, runs)
+    rng = random.Random(1)
+    pairs = [(rng.choice(queries), rng.choice(corpus)) for _ in range(PAIRS)]
+    index = fuzzy.FinderIndex(corpus)
+    choices = encoded_choices(corpus)
+
+    cases = {
+        "finder": [
+            lambda q=q: fuzzy.finder(q, corpus, lazy=False, limit=8) for q in queries
+        ],
+        "finder index": [lambda q=q: index.search(q, limit=8) for q in queries],
+        "extract": [lambda q=q: fuzzy.extract(q, choices, limit=5) for q in queries],
+        "extract_one": [
+            lambda q=q: fuzzy.extract_one(q, choices, scorer=fuzzy.ratio)
+            for q in queries
+        ],
+        "extract token_sort_ratio": [
+            lambda q=q: fuzzy.extract(
+                q, choices, scorer=fuzzy.token_sort_ratio, limit=5
+            )
+            for q in queries
+        ],
+        "partial_ratio": [lambda a=a, b=b: fuzzy.partial_ratio(a, b) for a, b in pairs],
+        "token_sort_ratio": [
+            lambda a=a, b=b: fuzzy.token_sort_ratio(a, b) for a, b in pairs
+        ],
+    }
+
+    results = [
+        {"corpus": name, "size": len(corpus), "case": "build finder index"}
+        | retained(lambda: fuzzy.FinderIndex(corpus)),
+        {"corpus": name, "size": len(corpus), "case": "build choice set"}
+        | retained(lambda: encoded_choices(corpus)),
+    ]
+    for case, calls in cases.items():
+        results.append(
+            {"corpus": name, "size": len(corpus), "case": case} | measure(calls)
+        )
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    print(
+        "{:<24} {:>7} {:<26} {:>9} {:>9} {:>9} {:>10} {:>7}".format(
+            "Corpus", "Size", "Case", "p50 ms", "p95 ms", "max ms", "peak KiB", "blocks"
+        )
+    )
+    for r in results:
+        print(
+            "{:<24} {:>7} {:<26} {:>9.3f} {:>9.3f} {:>9.3f} {:>10.1f} {:>7}".format(
+                r["corpus"][:24],
+                r["size"],
+                r["case"],
+                r["p50_ms"],
+                r["p95_ms"],
+                r["max_ms"],
+                r["peak_kib"],
+                r.get("alloc_blocks", "-"),
+            )
+        )
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args: argparse.Namespace):
+    corpora = {f"synthetic {size}": synthetic_corpus(size) for size in args.sizes}
+    for path in sorted(FIXTURES.glob("*.inv")):
+        corpora[path.stem] = load_fixture(path)
+    if args.only:
+        corpora = {k: v for k, v in corpora.items() if k in args.only}
+
+    results = []
+    for name, corpus in corpora.items():
+        print(f"Benchmarking {name} ({len(corpus)} entries)", file=sys.stderr)
+        results.extend(bench_corpus(name, corpus, args.runs))
+    print_results(results)
+
+    if args.output:
+        meta = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.datetime.utcnow().isoformat(),
+            "runs": args.runs,
+            "corpora": {name: corpus_digest(c) for name, c in corpora.items()},
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Saved results to {args.output}", file=sys.stderr)
+
+
+def compare(args: argparse.Namespace):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print(
+        "Comparing {} ({}) with {} ({})".format(
+            args.before,
+            before["meta"]["revision"],
+            args.after,
+            after["meta"]["revision"],
+        )
+    )
+
+    old = {(r["corpus"], r["case"]): r for r in before["results"]}
+    digests = before["meta"].get("corpora", {})
+    changed = {
+        name
+        for name, digest in after["meta"].get("corpora", {}).items()
+        if digests.get(name, digest) != digest
+    }
+    for name in sorted(changed):
+        print(f"Skipping {name}, its entries changed between the runs")
+    regressions = 0
+    print(
+        "{:<24} {:<26} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+            "Corpus", "Case", "p50 ms", "p50", "p95", "peak", "blocks"
+        )
+    )
+    for r in after["results"]:
+        previous = old.get((r["corpus"], r["case"]))
+        if previous is None or r["corpus"] in changed:
+            continue
+        changes = {
+            field: (
+                (r[field] - previous[field]) / previous[field] * 100
+                if previous[field]
+                else 0.0
+            )
+            for field in ("p50_ms", "p95_ms", "peak_kib", "alloc_blocks")
+            if field in r and field in previous
+        }
+        regressed = any(change > args.threshold for change in changes.values())
+        regressions += regressed
+        print(
+            "{:<24} {:<26} {:>9.3f} {:>+8.1f}% {:>+8.1f}% {:>+8.1f}% {:>9}{}".format(
+                r["corpus"][:24],
+                r["case"],
+                r["p50_ms"],
+                changes["p50_ms"],
+                changes["p95_ms"],
+                changes["peak_kib"],
+                (
+                    "{:+.1f}%".format(changes["alloc_blocks"])
+                    if "alloc_blocks" in changes
+                    else "-"
+                ),
+                "  REGRESSION" if regressed else "",
+            )
+        )
+
+    if regressions:
+        print(f"{regressions} regressions over {args.threshold}%")
+        raise SystemExit(1)
+
+
+def record(args: argparse.Namespace):
+    FIXTURES.mkdir(exist_ok=True)
+    for target in args.targets:
+        url = rtfm.URL_OVERRIDES.get(target, rtfm.TARGETS[target] + "/objects.inv")
+        with urllib.request.urlopen(url) as resp:
+            data = resp.read()
+        (FIXTURES / f"{target}.inv").write_bytes(data)
+        print(f"Recorded {target} ({len(data) // 1024} KiB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument(
+        "--sizes", type=int, nargs="*", default=[1000, 10_000, 100_000, 500_000]
+    )
+    run_parser.add_argument("--runs", type=int, default=50)
+    run_parser.add_argument("--only", nargs="+", help="Names of corpora to run")
+    run_parser.add_argument("--output")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10, help="Percent slower to flag"
+    )
+    compare_parser.set_defaults(func=compare)
+
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("targets", nargs="+")
+    record_parser.set_defaults(func=record)
+
+    args = parser.parse_args()
+    args.func(args)
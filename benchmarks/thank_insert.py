@@ -0,0 +1,104 @@
+"""
+Compares the old and new ways of recording a thank under concurrent load
+
+    python -m benchmarks.thank_insert --thanks 2000 --concurrency 50
+
+Uses the database from the usual config, the rows it creates use negative ids
+no discord snowflake can have and are deleted afterwards. Only meant for a
+local database, it refuses to run against anything else unless --force is
+passed.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from tortoise import Tortoise
+
+from bot.utils.thanks import record_thank
+from models import GuildModel, ThankModel, UserModel
+from tortoise_config import tortoise_config
+
+# Discord snowflakes are never negative
+GUILD_ID = -1
+USER_IDS = range(-501, -1)
+
+
+async def record_thank_orm(
+    guild_id: int, thanker_id: int, thanked_id: int, description: str
+):
+    await GuildModel.get_or_create(id=guild_id)
+    thanked, _ = await UserModel.get_or_create(id=thanked_id)
+    thanker, _ = await UserModel.get_or_create(id=thanker_id)
+    await ThankModel.create(
+        thanker=thanker, thanked=thanked, description=description, guild_id=guild_id
+    )
+
+
+async def run(
+    record: Callable[..., Awaitable], thanks: int, concurrency: int
+) -> List[float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        thanker, thanked = random.sample(USER_IDS, 2)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await record(GUILD_ID, thanker, thanked, "benchmark")
+            except Exception as e:
+                # Concurrent get_or_create calls can race on the same user
+                print(f"Failed: {e!r}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(thanks)))
+    return latencies
+
+
+async def cleanup():
+    await ThankModel.filter(guild_id=GUILD_ID).delete()
+    await UserModel.filter(id__in=list(USER_IDS)).delete()
+    await GuildModel.filter(id=GUILD_ID).delete()
+
+
+async def main(thanks: int, concurrency: int, force: bool):
+    credentials = tortoise_config["connections"]["default"]["credentials"]
+    if credentials["host"] not in ("localhost", "127.0.0.1", "::1") and not force:
+        raise SystemExit(
+            "Refusing to write to a database that isn't local, see --force"
+        )
+
+    await Tortoise.init(tortoise_config)
+    try:
+        for name, record in (("orm", record_thank_orm), ("single", record_thank)):
+            await cleanup()
+            start = time.perf_counter()
+            latencies = await run(record, thanks, concurrency)
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            print(
+                "{:<8} {:>6} ok {:>8.1f}/s  p50 {:>6.1f}ms  p99 {:>6.1f}ms".format(
+                    name,
+                    len(latencies),
+                    len(latencies) / elapsed,
+                    statistics.median(latencies) * 1000,
+                    latencies[int(len(latencies) * 0.99) - 1] * 1000,
+                )
+            )
+    finally:
+        await cleanup()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--thanks", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.thanks, args.concurrency, args.force))
@@ -0,0 +1,169 @@
+"""
+Latency of the thank queries with and without the composite indexes
+
+    python -m benchmarks.thank_queries --thanks 5000000
+
+Seeds the configured database with synthetic thanks, then runs each query the
+Thank cog makes with random arguments, first without the indexes added by the
+thank_indexes, thank_description_search and thank_export_index migrations and
+then with them. The thank_counts and thank_daily_counts tables are left alone.
+Only meant for a local throwaway database, it refuses to run against anything
+else unless --force is passed. --skip-seed reuses the data of a previous run.
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import time
+from typing import Dict, List
+
+from tortoise import Tortoise
+
+from bot.utils.thanks import (
+    EXPORT,
+    EXPORT_BATCH_SIZE,
+    LEADERBOARD,
+    LIST_RECEIVED,
+    LIST_RECEIVED_AFTER,
+    RECONCILE_COUNTS,
+    RECONCILE_DAILY_COUNTS,
+    SEARCH,
+    THANK_STATS,
+    WINDOW_LEADERBOARD,
+)
+from tortoise_config import tortoise_config
+
+INDEXES: Dict[str, str] = {
+    "idx_thanks_thanked_80dba8": 'ON "thanks" ("thanked_id", "guild_id", "time", "id")',
+    "idx_thanks_thanker_962db8": 'ON "thanks" ("thanker_id", "guild_id")',
+    "idx_thanks_guild_i_430197": 'ON "thanks" ("guild_id", "id")',
+    "idx_thanks_description_tsv": """ON "thanks" USING GIN (to_tsvector('english', "description"))""",
+    "idx_thank_counts_leaderboard": 'ON "thank_counts" ("guild_id", "count" DESC, "user_id")',
+    "idx_thank_daily_guild_i_35bbc6": 'ON "thank_daily_counts" ("guild_id", "day")',
+}
+
+SEED_GUILDS = """
+insert into guilds (id, prefix) select g, '.' from generate_series(1, $1) g
+on conflict do nothing
+""".strip()
+
+SEED_USERS = """
+insert into users (id) select u from generate_series(1, $1) u
+on conflict do nothing
+""".strip()
+
+# A few very active guilds and helpers and a long tail, like the real data
+SEED_THANKS = """
+insert into thanks (guild_id, thanker_id, thanked_id, description, time)
+select
+    1 + floor(power(random(), 3) * $1)::int,
+    1 + floor(random() * $2)::int,
+    1 + floor(power(random(), 2) * $2)::int,
+    'benchmark',
+    now() - random() * interval '2 years'
+from generate_series(1, $3)
+""".strip()
+
+
+def percentile(values: List[float], percent: float) -> float:
+    return sorted(values)[max(int(len(values) * percent / 100) - 1, 0)]
+
+
+async def seed(conn, guilds: int, users: int, thanks: int):
+    print(f"Seeding {thanks} thanks between {users} users in {guilds} guilds")
+    start = time.perf_counter()
+    await conn.execute_query(SEED_GUILDS, [guilds])
+    await conn.execute_query(SEED_USERS, [users])
+    await conn.execute_query(SEED_THANKS, [guilds, users, thanks])
+    await conn.execute_query(RECONCILE_COUNTS)
+    await conn.execute_query(RECONCILE_DAILY_COUNTS)
+    print(f"Seeded in {time.perf_counter() - start:.0f}s")
+
+
+async def measure(conn, guilds: int, users: int, thanks: int, runs: int):
+    def guild() -> int:
+        return 1 + int(random.random() ** 3 * guilds)
+
+    def user() -> int:
+        return 1 + int(random.random() ** 2 * users)
+
+    def since(days: int) -> datetime.date:
+        return datetime.datetime.utcnow().date() - datetime.timedelta(days=days - 1)
+
+    def before() -> datetime.datetime:
+        # Cursor of a page deep in a member's list
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return now - random.random() * datetime.timedelta(days=365)
+
+    queries = {
+        "list": lambda: (LIST_RECEIVED, [user(), guild(), 10]),
+        "list after": lambda: (
+            LIST_RECEIVED_AFTER,
+            [user(), guild(), 10, before(), thanks],
+        ),
+        "stats": lambda: (THANK_STATS, [user(), guild()]),
+        "leaderboard": lambda: (LEADERBOARD, [guild(), 10, 0]),
+        "leaderboard deep": lambda: (LEADERBOARD, [guild(), 10, 500]),
+        "leaderboard week": lambda: (WINDOW_LEADERBOARD, [guild(), 10, 0, since(7)]),
+        "leaderboard month": lambda: (WINDOW_LEADERBOARD, [guild(), 10, 0, since(30)]),
+        # Every seeded thank says benchmark
+        "search": lambda: (SEARCH, [guild(), "benchmark", 10, 0]),
+        "search no match": lambda: (SEARCH, [guild(), "nothing", 10, 0]),
+        "export batch": lambda: (
+            EXPORT,
+            [guild(), random.randrange(thanks), EXPORT_BATCH_SIZE],
+        ),
+    }
+    for name, make in queries.items():
+        latencies = []
+        for _ in range(runs):
+            query, values = make()
+            start = time.perf_counter()
+            await conn.execute_query(query, values)
+            latencies.append(time.perf_counter() - start)
+        print(
+            "  {:<18} p50 {:>8.2f}ms  p95 {:>8.2f}ms  max {:>8.2f}ms".format(
+                name,
+                percentile(latencies, 50) * 1000,
+                percentile(latencies, 95) * 1000,
+                max(latencies) * 1000,
+            )
+        )
+
+
+async def main(args: argparse.Namespace):
+    credentials = tortoise_config["connections"]["default"]["credentials"]
+    if credentials["host"] not in ("localhost", "127.0.0.1", "::1") and not args.force:
+        raise SystemExit("Refusing to seed a database that isn't local, see --force")
+
+    await Tortoise.init(tortoise_config)
+    conn = Tortoise.get_connection("default")
+    try:
+        if not args.skip_seed:
+            await seed(conn, args.guilds, args.users, args.thanks)
+
+        for name in INDEXES:
+            await conn.execute_script(f'DROP INDEX IF EXISTS "{name}"')
+        await conn.execute_script("ANALYZE")
+        print("Without indexes")
+        await measure(conn, args.guilds, args.users, args.thanks, args.runs)
+
+        for name, definition in INDEXES.items():
+            await conn.execute_script(f'CREATE INDEX "{name}" {definition}')
+        await conn.execute_script("ANALYZE")
+        print("With indexes")
+        await measure(conn, args.guilds, args.users, args.thanks, args.runs)
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--thanks", type=int, default=2_000_000)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--force", action="store_true")
+    asyncio.run(main(parser.parse_args()))
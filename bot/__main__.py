@@ -10,5 +10,11 @@ if __name__ == "__main__":
     from config.bot import bot_config
     from tortoise_config import tortoise_config
 
-    bot = TechStruckBot(tortoise_config=tortoise_config)
+    bot = TechStruckBot(
+        tortoise_config=tortoise_config,
+        lazy_extensions=bot_config.lazy_extensions,
+        shard_ids=bot_config.shard_ids,
+        shard_count=bot_config.shard_count,
+        cluster_id=bot_config.cluster_id,
+    )
     bot.run(bot_config.bot_token)
@@ -1,100 +1,222 @@
 import asyncio
 import contextlib
-import math
 import re
+import time
 import traceback
-from typing import Iterable
+from typing import Dict, List, Optional, Tuple
 
 from aiohttp import ClientSession
-from discord import (
-    AllowedMentions,
-    AsyncWebhookAdapter,
-    Color,
-    Embed,
-    Forbidden,
-    Intents,
-    Message,
-    NotFound,
-    TextChannel,
-    Webhook,
-    utils,
-)
+from discord import AllowedMentions, Color, Embed, Forbidden, Message, NotFound
 from discord.ext import commands, tasks
 from discord.http import HTTPClient
 from tortoise import Tortoise
 
+from bot.utils.cache_backend import make_cache_backend
+from bot.utils.cache_policy import CachePolicy, rss
+from bot.utils.error_reporter import ErrorReporter
+from bot.utils.event_router import REACTION_EVENTS, RawEventRouter
+from bot.utils.extensions import ExtensionLoader
+from bot.utils.guild_settings import GuildSettings
+from bot.utils.http_pool import HTTPPool
+from bot.utils.metrics import CommandMetrics, instrument_db_client
+from bot.utils.prefix import PrefixMatchers
+from bot.utils.startup_buffer import StartupBuffer
+from bot.utils.waiters import WaiterRegistry
 from config.bot import bot_config
-from models import GuildModel
 
+# Extensions mapped to the top level command names (and aliases) they add.
+# In lazy mode an extension is only loaded once one of those is invoked,
+# extensions without any have listeners/hooks and are always loaded on startup
+EXTENSIONS: Dict[str, Tuple[str, ...]] = {
+    "bot.core": (),
+    "bot.cogs.admin": ("refresh",),
+    "bot.cogs.thank": ("thank", "thanks", "rep"),
+    "bot.cogs.stackexchange": (
+        "stackprofile",
+        "stackpro",
+        "stackacc",
+        "stackaccount",
+        "stacksearch",
+        "stackser",
+        "stacksite",
+        "stacksites",
+        "linkstack",
+        "lnstack",
+    ),
+    "bot.cogs.github": (
+        "linkgithub",
+        "lngithub",
+        "gist",
+        "gs",
+        "githubsearch",
+        "ghsearch",
+        "ghse",
+        "githubstats",
+        "ghstats",
+        "ghst",
+        "githublanguages",
+        "ghlangs",
+        "ghtoplangs",
+    ),
+    "bot.cogs.help_command": (),
+    "bot.cogs.code_exec": ("run", "runl"),
+    "bot.cogs.fun": ("beer", "beers", "beerparty"),
+    "bot.cogs.rtfm": ("rtfm",),
+    "bot.cogs.joke": (),
+    "bot.cogs.utils": ("embed", "rawembed", "source"),
+    "bot.cogs.brainfeed": ("brainfeed", "bf", "brain", "feed"),
+    "bot.cogs.packages": ("pypisearch", "pypi", "npmsearch", "npm", "crate", "crates"),
+    "bot.cogs.coc": (),
+}
+JISHAKU: Dict[str, Tuple[str, ...]] = {"jishaku": ("jishaku", "jsk")}
 
-class TechStruckBot(commands.Bot):
+# Privileged intents needed by extensions, on top of the default ones
+EXTENSION_INTENTS: Dict[str, Tuple[str, ...]] = {
+    # Member statuses for pinging online players
+    "bot.cogs.coc": ("members", "presences"),
+}
+
+
+class TechStruckBot(commands.AutoShardedBot):
     http: HTTPClient
 
-    def __init__(self, *, tortoise_config, load_extensions=True, loadjsk=True):
+    def __init__(
+        self,
+        *,
+        tortoise_config,
+        load_extensions=True,
+        loadjsk=True,
+        lazy_extensions=False,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        cluster_id: int = 0,
+    ):
+        self.startup_rss = rss()
+        self.ready_rss: Optional[int] = None
+        self.cache_policy = CachePolicy(
+            intent
+            for ext, intents in EXTENSION_INTENTS.items()
+            if load_extensions and ext in EXTENSIONS
+            for intent in intents
+        )
         allowed_mentions = AllowedMentions(
             users=True, replied_user=True, roles=False, everyone=False
         )
         super().__init__(
             command_prefix=self.get_custom_prefix,
-            intents=Intents.all(),
+            intents=self.cache_policy.intents,
+            member_cache_flags=self.cache_policy.member_cache_flags,
+            chunk_guilds_at_startup=False,
+            max_messages=bot_config.max_messages,
             allowed_mentions=allowed_mentions,
             description="A bot by and for developers to integrate several tools into one place.",
             strip_after_prefix=True,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
         )
         self.tortoise_config = tortoise_config
-        self.db_connected = False
-        self.prefix_cache = {}
+        self.cluster_id = cluster_id
+        # Shard id to when it last connected, for the cluster health stats
+        self.shards_connected_at: Dict[int, float] = {}
+        self.db_ready = asyncio.Event()
+        self.startup_buffer: StartupBuffer[Message] = StartupBuffer(
+            bot_config.startup_buffer_size
+        )
+        self.cache = make_cache_backend(bot_config.cache_backend, tortoise_config)
+        self.guild_settings = GuildSettings(self.cache)
+        self.prefix_matchers = PrefixMatchers()
+        self.error_reporter = ErrorReporter(
+            self,
+            bot_config.log_webhook,
+            interval=bot_config.error_report_interval,
+        )
+        self.extension_loader = ExtensionLoader(self)
+        self.http_pool = HTTPPool()
+        self.command_metrics = CommandMetrics()
+        self.waiters = WaiterRegistry()
+        self.event_router = RawEventRouter()
+        self.before_invoke(self.command_metrics.before_invoke)
+        self.after_invoke(self.command_metrics.after_invoke)
         self.connect_db.start()
 
         if load_extensions:
-            self.load_extensions(
-                (
-                    "bot.core",
-                    "bot.cogs.admin",
-                    "bot.cogs.thank",
-                    "bot.cogs.stackexchange",
-                    "bot.cogs.github",
-                    "bot.cogs.help_command",
-                    "bot.cogs.code_exec",
-                    "bot.cogs.fun",
-                    "bot.cogs.rtfm",
-                    "bot.cogs.joke",
-                    "bot.cogs.utils",
-                    "bot.cogs.brainfeed",
-                    "bot.cogs.packages",
-                    "bot.cogs.coc",
-                )
-            )
+            self.load_extensions(EXTENSIONS, lazy=lazy_extensions)
         if loadjsk:
-            self.load_extension("jishaku")
+            self.load_extensions(JISHAKU, lazy=lazy_extensions)
 
     @property
     def session(self) -> ClientSession:
-        return self.http._HTTPClient__session  # type: ignore
+        return self.http_pool.session
+
+    async def close(self):
+        await super().close()
+        await self.http_pool.close()
+        await self.cache.close()
+
+    def dispatch(self, event_name: str, *args, **kwargs):
+        super().dispatch(event_name, *args, **kwargs)
+        if event_name == "reaction_add":
+            self.waiters.dispatch_reaction(*args)
+        elif event_name == "message":
+            self.waiters.dispatch_message(*args)
+        elif event_name in REACTION_EVENTS:
+            self.event_router.dispatch(event_name, *args)
 
     @tasks.loop(seconds=0, count=1)
     async def connect_db(self):
         print("Connecting to db")
         await Tortoise.init(self.tortoise_config)
-        self.db_connected = True
+        instrument_db_client(type(Tortoise.get_connection("default")))
+        await self.cache.start()
+        await self.guild_settings.preload(self.owns_guild)
         print("Database connected")
 
-    def load_extensions(self, extentions: Iterable[str]):
-        for ext in extentions:
+        # Replay messages received while connecting one at a time, in the order
+        # they arrived. Messages keep being buffered behind them until the
+        # buffer is empty, so none of them can overtake an older one.
+        for msg in self.startup_buffer.drain():
             try:
-                self.load_extension(ext)
+                await self.handle_message(msg)
+            except Exception:
+                traceback.print_exc()
+        self.db_ready.set()
+        print(
+            "Replayed {0.replayed} buffered messages, dropped {0.dropped}".format(
+                self.startup_buffer
+            )
+        )
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """Whether the guild is on one of the shards run by this process"""
+        if self.shard_ids is None or self.shard_count is None:
+            return True
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    def load_extensions(
+        self, extensions: Dict[str, Tuple[str, ...]], *, lazy: bool = False
+    ):
+        for ext, command_names in extensions.items():
+            try:
+                if lazy and command_names:
+                    self.extension_loader.add_lazy(ext, command_names)
+                else:
+                    self.extension_loader.load(ext)
             except Exception as e:
                 traceback.print_exception(type(e), e, e.__traceback__)
 
     async def on_message(self, msg: Message):
         if msg.author.bot:
             return
-        while not self.db_connected:
-            await asyncio.sleep(0.2)
+        if not self.db_ready.is_set():
+            self.startup_buffer.add(msg)
+            return
+        await self.handle_message(msg)
+
+    async def handle_message(self, msg: Message):
         user_id = self.user.id
         if msg.content in (f"<@{user_id}>", f"<@!{user_id}>"):
             return await msg.reply(
-                "My prefix here is `{}`".format(await self.fetch_prefix(msg))
+                "My prefix here is `{}`".format(self.fetch_prefix(msg))
             )
         await self.process_commands(msg)
 
@@ -121,100 +243,29 @@ class TechStruckBot(commands.Bot):
         with contextlib.suppress(NotFound, Forbidden):
             await ctx.send(embed=embed)
 
-        traceback_text = "".join(
-            traceback.format_exception(type(error), error, error.__traceback__)
-        )
+        self.error_reporter.report(ctx, error)
 
-        length = len(traceback_text)
-        chunks = math.ceil(length / 1990)
-
-        traceback_texts = [
-            traceback_text[l * 1990 : (l + 1) * 1990] for l in range(chunks)
-        ]
-        traceback_embeds = [
-            Embed(
-                title="Traceback",
-                description=("```py\n" + text + "\n```"),
-                color=Color.red(),
-            )
-            for text in traceback_texts
-        ]
+    async def get_custom_prefix(self, _, message: Message) -> str:
+        prefix = self.fetch_prefix(message)
+        matcher = self.prefix_matchers.get(prefix, self.user.id)
+        return matcher.match(message.content) or prefix
 
-        # Add message content
-        info_embed = Embed(
-            title="Message content",
-            description="```\n" + utils.escape_markdown(ctx.message.content) + "\n```",
-            color=Color.red(),
-        )
-        # Guild information
-        value = (
-            (
-                "**Name**: {0.name}\n"
-                "**ID**: {0.id}\n"
-                "**Created**: {0.created_at}\n"
-                "**Joined**: {0.me.joined_at}\n"
-                "**Member count**: {0.member_count}\n"
-                "**Permission integer**: {0.me.guild_permissions.value}"
-            ).format(ctx.guild)
-            if ctx.guild
-            else "None"
-        )
+    def fetch_prefix(self, message: Message) -> str:
+        # DMs/Group have no guild and use the default
+        return self.guild_settings.get_prefix(message.guild and message.guild.id)
 
-        info_embed.add_field(name="Guild", value=value)
-        # Channel information
-        if isinstance(ctx.channel, TextChannel):
-            value = (
-                "**Type**: TextChannel\n"
-                "**Name**: {0.name}\n"
-                "**ID**: {0.id}\n"
-                "**Created**: {0.created_at}\n"
-                "**Permission integer**: {1}\n"
-            ).format(ctx.channel, ctx.channel.permissions_for(ctx.guild.me).value)
-        else:
-            value = (
-                "**Type**: DM\n" "**ID**: {0.id}\n" "**Created**: {0.created_at}\n"
-            ).format(ctx.channel)
-
-        info_embed.add_field(name="Channel", value=value)
-
-        # User info
-        value = (
-            "**Name**: {0}\n" "**ID**: {0.id}\n" "**Created**: {0.created_at}\n"
-        ).format(ctx.author)
-
-        info_embed.add_field(name="User", value=value)
-
-        wh = Webhook.from_url(
-            bot_config.log_webhook, adapter=AsyncWebhookAdapter(self.session)
-        )
-        return await wh.send(embeds=[*traceback_embeds, info_embed])
+    async def on_shard_ready(self, shard_id: int):
+        self.shards_connected_at[shard_id] = time.time()
 
-    async def get_custom_prefix(self, _, message: Message) -> str:
-        prefix = await self.fetch_prefix(message)
-        bot_id = self.user.id
-        prefixes = [prefix, f"<@{bot_id}> ", f"<@!{bot_id}> "]
+    async def on_shard_disconnect(self, shard_id: int):
+        self.shards_connected_at.pop(shard_id, None)
 
-        comp = re.compile(
-            "^(" + "|".join(re.escape(p) for p in prefixes) + ").*", flags=re.I
-        )
-        match = comp.match(message.content)
-        if match is not None:
-            return match.group(1)
-        return prefix
-
-    async def fetch_prefix(self, message: Message) -> str:
-        # DMs/Group
-        if not message.guild:
-            return "."
-
-        guild_id = message.guild.id
-        # Get from cache
-        if guild_id in self.prefix_cache:
-            return self.prefix_cache[guild_id]
-        # Fetch from db
-        guild, _ = await GuildModel.get_or_create(id=guild_id)
-        self.prefix_cache[guild_id] = guild.prefix
-        return guild.prefix
+    async def on_shard_resumed(self, shard_id: int):
+        self.shards_connected_at.setdefault(shard_id, time.time())
 
     async def on_ready(self):
-        print("Ready!")
+        if self.ready_rss is None:
+            self.ready_rss = rss()
+        print(
+            "Ready! Cluster {} with shards {}".format(self.cluster_id, self.shard_ids)
+        )
@@ -0,0 +1,89 @@
+"""
+Runs the bot as several processes, each connecting a range of the shards
+
+    python -m bot.cluster
+
+Every process is a regular `python -m bot` with its shards passed through the
+environment. Processes that exit are restarted.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from discord.http import HTTPClient
+
+from config.bot import bot_config
+
+# Discord allows a shard to identify every 5 seconds
+IDENTIFY_DELAY = 5
+RESTART_DELAY = 10
+
+
+async def recommended_shards(token: str) -> int:
+    http = HTTPClient()
+    try:
+        await http.static_login(token, bot=True)
+        shards, _ = await http.get_bot_gateway()
+        return shards
+    finally:
+        await http.close()
+
+
+def split_shards(shard_count: int, cluster_count: int) -> List[List[int]]:
+    """Split the shard ids into `cluster_count` contiguous ranges of near equal size"""
+    size, extra = divmod(shard_count, cluster_count)
+    clusters = []
+    start = 0
+    for i in range(cluster_count):
+        end = start + size + (i < extra)
+        clusters.append(list(range(start, end)))
+        start = end
+    return [ids for ids in clusters if ids]
+
+
+def spawn(cluster_id: int, shard_ids: List[int], shard_count: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CLUSTER_ID": str(cluster_id),
+        "SHARD_IDS": json.dumps(shard_ids),
+        "SHARD_COUNT": str(shard_count),
+    }
+    print(f"Starting cluster {cluster_id} with shards {shard_ids}")
+    return subprocess.Popen([sys.executable, "-m", "bot"], env=env)
+
+
+def main():
+    shard_count = bot_config.shard_count or asyncio.run(
+        recommended_shards(bot_config.bot_token)
+    )
+    clusters = split_shards(shard_count, bot_config.cluster_count)
+    processes: Dict[int, subprocess.Popen] = {}
+    for cluster_id, shard_ids in enumerate(clusters):
+        processes[cluster_id] = spawn(cluster_id, shard_ids, shard_count)
+        # Let the cluster identify its shards before the next one starts
+        time.sleep(IDENTIFY_DELAY * len(shard_ids))
+
+    try:
+        while True:
+            time.sleep(RESTART_DELAY)
+            for cluster_id, process in processes.items():
+                code = process.poll()
+                if code is not None:
+                    print(f"Cluster {cluster_id} exited with code {code}, restarting")
+                    processes[cluster_id] = spawn(
+                        cluster_id, clusters[cluster_id], shard_count
+                    )
+    except KeyboardInterrupt:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
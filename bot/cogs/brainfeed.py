@@ -2,7 +2,7 @@ import asyncio
 from datetime import datetime
 from functools import cached_property
 
-from discord import Embed, Member, NotFound, Reaction, TextChannel
+from discord import Embed, NotFound, TextChannel
 from discord.ext import commands, flags  # type: ignore
 from discord.utils import get
 
@@ -44,13 +44,13 @@ class BrainFeed(commands.Cog):
         await msg.add_reaction("\u2705")
         await msg.add_reaction("\u274c")
 
-        def check(r: Reaction, u: Member):
-            return (
-                u == ctx.author and r.emoji in ("\u2705", "\u274c") and r.message == msg
-            )
-
         try:
-            r, _ = await self.bot.wait_for("reaction_add", check=check, timeout=120)
+            r, _ = await self.bot.waiters.wait_for_reaction(
+                msg.id,
+                timeout=120,
+                user_ids={ctx.author.id},
+                emojis=("\u2705", "\u274c"),
+            )
         except asyncio.TimeoutError:
             return await msg.reply("Timeout!")
         if r.emoji == "\u274c":
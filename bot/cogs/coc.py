@@ -2,8 +2,6 @@ import asyncio
 import re
 import time
 
-import aiohttp
-
 import discord
 from discord.ext import commands
 
@@ -24,6 +22,11 @@ class ClashOfCode(commands.Cog):
         self.session_message_id: int = 0
         self.session_users = []
         self.previous_clash: int = 0
+        self.bot.event_router.add(self.role_reaction, message_id=coc_message)
+
+    def cog_unload(self):
+        self.bot.event_router.remove_handler(self.role_reaction)
+        self.bot.event_router.remove_handler(self.session_reaction)
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -33,57 +36,61 @@ class ClashOfCode(commands.Cog):
     def role(self):
         return self.guild.get_role(coc_role)
 
+    async def fetch_clash(self, handle: str) -> dict:
+        resp = await self.bot.http_pool.post("codingame", API_URL, json=[handle])
+        return await resp.json()
+
     def em(self, mode, players):
         embed = discord.Embed(title="**Clash started**", color=discord.Color.random())
         embed.add_field(name="Mode", value=mode, inline=False)
         embed.add_field(name="Players", value=players)
         return embed
 
-    @commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+    async def role_reaction(self, payload: discord.RawReactionActionEvent):
         if payload.user_id == self.bot.user.id:
             return
 
-        if self.session_message_id != 0:
-            if payload.message_id == self.session_message_id:
-                if payload.emoji.id == 859056281788743690:
-                    if payload.user_id not in self.session_users:
-                        self.session_users.append(payload.user_id)
-        if payload.message_id != coc_message:
+        if payload.event_type == "REACTION_ADD":
+            if self.role in payload.member.roles:
+                return
+
+            await payload.member.add_roles(self.role)
+            try:
+                await payload.member.send(f"Gave you the **{self.role.name}** role!")
+            except discord.HTTPException:
+                pass
             return
 
-        if self.role in payload.member.roles:
+        member = await self.bot.cache_policy.get_member(self.guild, payload.user_id)
+        if member is None or self.role not in member.roles:
             return
 
-        await payload.member.add_roles(self.role)
+        await member.remove_roles(self.role)
         try:
-            await payload.member.send(f"Gave you the **{self.role.name}** role!")
+            await member.send(f"Removed your **{self.role.name}** role!")
         except discord.HTTPException:
             pass
 
-    @commands.Cog.listener()
-    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+    async def session_reaction(self, payload: discord.RawReactionActionEvent):
         if payload.user_id == self.bot.user.id:
             return
-
-        if self.session_message_id != 0:
-            if payload.message_id == self.session_message_id:
-                if payload.emoji.id == 859056281788743690:
-                    if payload.user_id in self.session_users:
-                        self.session_users.remove(payload.user_id)
-
-        if payload.message_id != coc_message:
+        if payload.emoji.id != 859056281788743690:
             return
 
-        member = self.guild.get_member(payload.user_id)
-        if self.role not in member.roles:
-            return
+        if payload.event_type == "REACTION_ADD":
+            if payload.user_id not in self.session_users:
+                self.session_users.append(payload.user_id)
+        elif payload.user_id in self.session_users:
+            self.session_users.remove(payload.user_id)
 
-        await member.remove_roles(self.role)
-        try:
-            await member.send(f"Removed your **{self.role.name}** role!")
-        except discord.HTTPException:
-            pass
+    def close_session(self):
+        self.bot.event_router.remove(
+            self.session_reaction, message_id=self.session_message_id
+        )
+        self.previous_clash = 0
+        self.session_users = []
+        self.session_message_id = 0
+        self.session = False
 
     @commands.group(name="clashofcode", aliases=["coc"])
     @commands.check(lambda ctx: ctx.channel.id == coc_channel)
@@ -117,6 +124,7 @@ class ClashOfCode(commands.Cog):
             suffix="",
         )
 
+        await self.bot.cache_policy.chunk(self.guild)
         for member in self.role.members:
             if member != ctx.author:
                 if member.status != discord.Status.offline:
@@ -133,6 +141,7 @@ class ClashOfCode(commands.Cog):
 
         msg = await ctx.send(pager.pages[0])
         self.session_message_id = msg.id
+        self.bot.event_router.add(self.session_reaction, message_id=msg.id)
         await msg.add_reaction("<:poggythumbsup:859056281788743690>")
 
         try:
@@ -153,10 +162,7 @@ class ClashOfCode(commands.Cog):
                 except:
                     await ctx.send("Failed to unpin message")
 
-                self.previous_clash = 0
-                self.session_users = []
-                self.session_message_id = 0
-                self.session = False
+                self.close_session()
                 break
 
     @session.command(name="join", aliases=["j"])
@@ -209,10 +215,7 @@ class ClashOfCode(commands.Cog):
         except:
             await ctx.send("Error while fetching message to unpin")
 
-        self.previous_clash = 0
-        self.session_users = []
-        self.session_message_id = 0
-        self.session = False
+        self.close_session()
 
         return await ctx.send(
             f"Clash session has been closed by {ctx.author.mention}. See you later :wave:"
@@ -259,9 +262,7 @@ class ClashOfCode(commands.Cog):
 
         id = link[1]
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(API_URL, json=[id]) as resp:
-                json = await resp.json()
+        json = await self.fetch_clash(id)
 
         pager = commands.Paginator(
             prefix="\n".join(
@@ -277,8 +278,8 @@ class ClashOfCode(commands.Cog):
 
         for member_id in self.session_users:
             if member_id != ctx.author.id:
-                member = self.bot.get_user(member_id)
-                pager.add_line(member.mention + ", ")
+                # Mentioning by id doesn't need the member to be cached
+                pager.add_line(f"<@{member_id}>, ")
 
         if not len(pager.pages):
             return await ctx.send(
@@ -288,11 +289,9 @@ class ClashOfCode(commands.Cog):
         for page in pager.pages:
             await ctx.send(page)
 
-        async with aiohttp.ClientSession() as session:
-            while not json["started"]:
-                await asyncio.sleep(10)  # wait 10s to avoid flooding the API
-                async with session.post(API_URL, json=[id]) as resp:
-                    json = await resp.json()
+        while not json["started"]:
+            await asyncio.sleep(10)  # wait 10s to avoid flooding the API
+            json = await self.fetch_clash(id)
 
         players = len(json["players"])
         players_text = ", ".join(
@@ -303,22 +302,18 @@ class ClashOfCode(commands.Cog):
         )
         start_message = await ctx.send(embed=self.em(json["mode"], players_text))
 
-        async with aiohttp.ClientSession() as session:
-            while not json["finished"]:
-                await asyncio.sleep(10)  # wait 10s to avoid flooding the API
-                async with session.post(API_URL, json=[id]) as resp:
-                    json = await resp.json()
-
-                if len(json["players"]) != players:
-                    players_text = ", ".join(
-                        [
-                            p["codingamerNickname"]
-                            for p in sorted(
-                                json["players"], key=lambda p: p["position"]
-                            )
-                        ]
-                    )
-                    await start_message.edit(embed=self.em(json["mode"], players_text))
+        while not json["finished"]:
+            await asyncio.sleep(10)  # wait 10s to avoid flooding the API
+            json = await self.fetch_clash(id)
+
+            if len(json["players"]) != players:
+                players_text = ", ".join(
+                    [
+                        p["codingamerNickname"]
+                        for p in sorted(json["players"], key=lambda p: p["position"])
+                    ]
+                )
+                await start_message.edit(embed=self.em(json["mode"], players_text))
 
         embed = discord.Embed(
             title="**Clash finished, here are the results**",
@@ -28,12 +28,9 @@ class CodeExec(commands.Cog):
         # TODO: Improve this further
         self.regex = re.compile(r"(\w*)\s*(?:```)(\w*)?([\s\S]*)(?:```$)")
 
-    @property
-    def session(self):
-        return self.bot.http._HTTPClient__session  # type: ignore
-
     async def _run_code(self, *, lang: str, code: str):
-        res = await self.session.post(
+        res = await self.bot.http_pool.post(
+            "piston",
             "https://emkc.org/api/v1/piston/execute",
             json={"language": lang, "source": code},
         )
@@ -82,7 +79,7 @@ class CodeExec(commands.Cog):
             )
         output = result["output"]
         #        if len(output) > 2000:
-        #            url = await create_guest_paste_bin(self.session, output)
+        #            url = await create_guest_paste_bin(self.bot.session, output)
         #            return await ctx.reply("Your output was too long, so here's the pastebin link " + url)
         embed = Embed(title=f"Ran your {result['language']} code", color=Color.green())
         output = output[:500].strip()
@@ -28,12 +28,11 @@ class Fun(commands.Cog):
         beer_offer = beer_offer + f"\n\nReason: {reason}" if reason else beer_offer
         msg = await ctx.send(beer_offer)
 
-        def reaction_check(reaction, m):
-            return m.id == user.id and str(reaction.emoji) == "🍻"
-
         try:
             await msg.add_reaction("🍻")
-            await self.bot.wait_for("reaction_add", timeout=30.0, check=reaction_check)
+            await self.bot.waiters.wait_for_reaction(
+                msg.id, timeout=30.0, user_ids={user.id}, emojis=("🍻",)
+            )
             await msg.edit(
                 content=f"{user.name} and {ctx.author.name} are enjoying a lovely beer together :beers:"
             )
@@ -72,12 +71,12 @@ class Fun(commands.Cog):
         msg = await ctx.send(message)
         await msg.add_reaction("\U0001f37b")
 
-        def check(r, m):
-            return m in members and r.message == msg and str(r.emoji) == "\U0001f37b"
-
+        member_ids = {m.id for m in members}
         while True:
             try:
-                r, _ = await self.bot.wait_for("reaction_add", check=check, timeout=60)
+                r, _ = await self.bot.waiters.wait_for_reaction(
+                    msg.id, timeout=60, user_ids=member_ids, emojis=("\U0001f37b",)
+                )
             except asyncio.TimeoutError:
                 return await msg.edit(
                     content="Ouch, looks like not everyone wants beer now..."
@@ -4,7 +4,6 @@ from io import BytesIO
 from typing import Optional
 from urllib.parse import urlencode
 
-from cachetools import TTLCache
 from discord import Color, Embed, File, Forbidden, Member
 from discord.ext import commands
 from jose import jwt
@@ -34,23 +33,19 @@ class Github(commands.Cog):
         self.bot = bot
         self.themes = "default dark radical merko gruvbox tokyonight onedark cobalt synthwave highcontrast dracula".split()
         self.files_regex = re.compile(r"\s{0,}```\w{0,}\s{0,}")
-        self.token_cache = TTLCache(maxsize=1000, ttl=600)
-
-    @property
-    def session(self):
-        return self.bot.http._HTTPClient__session  # type: ignore
+        self.bot.cache.add_namespace("github_tokens", maxsize=1000, ttl=600)
 
     async def cog_before_invoke(self, ctx: commands.Context):
         if ctx.command == self.link_github:
             return
 
-        token = self.token_cache.get(ctx.author.id)
+        token = await self.bot.cache.get("github_tokens", ctx.author.id)
         if not token:
             user = await UserModel.get_or_none(id=ctx.author.id)
             if user is None or user.github_oauth_token is None:
                 raise GithubNotLinkedError()
             token = user.github_oauth_token
-            self.token_cache[ctx.author.id] = token
+            await self.bot.cache.set("github_tokens", ctx.author.id, token)
         ctx.gh_token = token  # type: ignore
 
     @commands.command(name="linkgithub", aliases=["lngithub"])
@@ -238,7 +233,9 @@ class Github(commands.Cog):
     async def get_file_from_svg_url(
         self, url: str, *, params={}, exclude=[], fmt="PNG"
     ):
-        res = await (await self.session.get(url, params=params)).content.read()
+        res = await (
+            await self.bot.http_pool.get("github_stats", url, params=params)
+        ).content.read()
         for i in exclude:
             res = res.replace(
                 i, b""
@@ -268,12 +265,15 @@ class Github(commands.Cog):
         params: dict = None,
         json: dict = None,
     ):
-        return await self.session.request(
+        return await self.bot.http_pool.request(
+            "github",
             req_type,
             f"https://api.github.com{endpoint}",
             params=params,
             json=json,
             headers={"Authorization": f"Bearer {ctx.gh_token}"},
+            # Github's quota is per token
+            ratelimit_key=ctx.author.id,
         )
 
     async def get_gh_user(self, ctx: commands.Context):
@@ -14,6 +14,11 @@ class HelpCommand(commands.HelpCommand):
 
     COLOUR = discord.Colour.greyple()
 
+    async def prepare_help_command(self, ctx, command=None):
+        # Lazily loaded extensions only have hidden stubs until loaded
+        ctx.bot.extension_loader.load_all_pending()
+        await super().prepare_help_command(ctx, command)
+
     def get_ending_note(self):
         return "Use {0}{1} [command] for more info on a command.".format(
             self.clean_prefix, self.invoked_with
@@ -5,6 +5,8 @@ from discord.ext import commands
 
 from models import JokeModel, UserModel
 
+JOKE_CHANNEL = 815237244218114058
+
 joke_format = """**Setup**: {0.setup}\n
 **End**: {0.end}\n
 **Server**: {1.name} (`{1.id}`)\n
@@ -17,6 +19,10 @@ class Joke(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.bot.event_router.add(self.reaction_listener, channel_id=JOKE_CHANNEL)
+
+    def cog_unload(self):
+        self.bot.event_router.remove_handler(self.reaction_listener)
 
     @commands.group(invoke_without_command=True)
     async def joke(self, ctx: commands.Context):
@@ -57,24 +63,19 @@ class Joke(commands.Cog):
 
     @property
     def joke_entries_channel(self) -> TextChannel:
-        return self.bot.get_channel(815237244218114058)
+        return self.bot.get_channel(JOKE_CHANNEL)
 
     async def _get_input(self, ctx: commands.Context, title: str, description: str):
         await ctx.send(
             embed=Embed(title=title, description=description, color=Color.dark_blue())
         )
 
-        def check(m: Message):
-            return m.author == ctx.author and m.channel == ctx.channel
-
-        res: Message = await self.bot.wait_for("message", check=check, timeout=120)
+        res = await self.bot.waiters.wait_for_message(
+            ctx.channel.id, author_id=ctx.author.id, timeout=120
+        )
         return await commands.clean_content().convert(ctx, res.content)
 
-    @commands.Cog.listener("on_raw_reaction_add")
-    @commands.Cog.listener("on_raw_reaction_remove")
     async def reaction_listener(self, payload: RawReactionActionEvent):
-        if payload.channel_id != 815237244218114058:
-            return
         msg: Message = await self.joke_entries_channel.fetch_message(payload.message_id)
 
         up_reaction = utils.get(msg.reactions, emoji="\u2705")
@@ -10,18 +10,14 @@ class Packages(Cog):
     def __init__(self, bot: TechStruckBot):
         self.bot = bot
 
-    @property
-    def session(self):
-        return self.bot.session
-
-    async def get_package(self, url: str):
-        return await self.session.get(url=url)
+    async def get_package(self, registry: str, url: str):
+        return await self.bot.http_pool.get(registry, url)
 
     @command(aliases=["pypi"])
     async def pypisearch(self, ctx: Context, arg: str):
         """Get info about a Python package directly from PyPi"""
 
-        res_raw = await self.get_package(f"https://pypi.org/pypi/{arg}/json")
+        res_raw = await self.get_package("pypi", f"https://pypi.org/pypi/{arg}/json")
 
         try:
             res_json = await res_raw.json()
@@ -70,7 +66,7 @@ class Packages(Cog):
     async def npmsearch(self, ctx: Context, arg: str):
         """Get info about a NPM package directly from the NPM Registry"""
 
-        res_raw = await self.get_package(f"https://registry.npmjs.org/{arg}/")
+        res_raw = await self.get_package("npm", f"https://registry.npmjs.org/{arg}/")
 
         res_json = await res_raw.json()
 
@@ -134,7 +130,9 @@ class Packages(Cog):
     async def crate(self, ctx: Context, arg: str):
         """Get info about a Rust package directly from the Crates.IO Registry"""
 
-        res_raw = await self.get_package(f"https://crates.io/api/v1/crates/{arg}")
+        res_raw = await self.get_package(
+            "crates", f"https://crates.io/api/v1/crates/{arg}"
+        )
 
         res_json = await res_raw.json()
 
@@ -1,4 +1,4 @@
-from discord import Color, Embed, Message
+from discord import Color, Embed
 from discord.ext import commands
 from quizapi import create_quiz_api
 
@@ -16,9 +16,6 @@ class Quiz(commands.Cog):
         questions = await self.session.get_quiz(limit=5, category="linux")
         embed = Embed(title="Big Brain Time", color=Color.darker_gray())
 
-        def check(m: Message):
-            return m.channel == ctx.channel
-
         scoreboard = {}
         for q in questions:
             embed.clear_fields()
@@ -37,7 +34,9 @@ class Quiz(commands.Cog):
             unanswered = True
             while unanswered:
                 try:
-                    resp = await self.bot.wait_for("message", check=check, timeout=45)
+                    resp = await self.bot.waiters.wait_for_message(
+                        ctx.channel.id, timeout=45
+                    )
                 except:
                     return await ctx.send("No one answered")
                 # await resp.delete()
@@ -1,91 +1,86 @@
+import asyncio
 import warnings
+from operator import itemgetter
 
-import aiohttp
+from aiohttp import ClientError
 from discord import Color, Embed
 from discord.ext import commands, flags
 
 from bot.bot import TechStruckBot
 from bot.utils import fuzzy, rtfm
+from config.bot import bot_config
 
 
 class RTFM(commands.Cog):
     """Search through manuals of several python modules and python itself"""
 
-    targets = {
-        "python": "https://docs.python.org/3",
-        "discord.py": "https://discordpy.readthedocs.io/en/latest",
-        "numpy": "https://numpy.readthedocs.io/en/latest",
-        "pandas": "https://pandas.pydata.org/docs",
-        "pillow": "https://pillow.readthedocs.io/en/stable",
-        "imageio": "https://imageio.readthedocs.io/en/stable",
-        "requests": "https://requests.readthedocs.io/en/master",
-        "aiohttp": "https://docs.aiohttp.org/en/stable",
-        "django": "https://django.readthedocs.io/en/stable",
-        "flask": "https://flask.palletsprojects.com/en/1.1.x",
-        "praw": "https://praw.readthedocs.io/en/latest",
-        "apraw": "https://apraw.readthedocs.io/en/latest",
-        "asyncpg": "https://magicstack.github.io/asyncpg/current",
-        "aiosqlite": "https://aiosqlite.omnilib.dev/en/latest",
-        "sqlalchemy": "https://docs.sqlalchemy.org/en/14",
-        "tensorflow": "https://www.tensorflow.org/api_docs/python",
-        "matplotlib": "https://matplotlib.org/stable",
-        "seaborn": "https://seaborn.pydata.org",
-        "pygame": "https://www.pygame.org/docs",
-        "simplejson": "https://simplejson.readthedocs.io/en/latest",
-        "wikipedia": "https://wikipedia.readthedocs.io/en/latest",
-    }
-
-    aliases = {
-        ("py", "py3", "python3", "python"): "python",
-        ("dpy", "discord.py", "discordpy"): "discord.py",
-        ("np", "numpy", "num"): "numpy",
-        ("pd", "pandas", "panda"): "pandas",
-        ("pillow", "pil"): "pillow",
-        ("imageio", "imgio", "img"): "imageio",
-        ("requests", "req"): "requests",
-        ("aiohttp", "http"): "aiohttp",
-        ("django", "dj"): "django",
-        ("flask", "fl"): "flask",
-        ("reddit", "praw", "pr"): "praw",
-        ("asyncpraw", "apraw", "apr"): "apraw",
-        ("asyncpg", "pg"): "asyncpg",
-        ("aiosqlite", "sqlite", "sqlite3", "sqli"): "aiosqlite",
-        ("sqlalchemy", "sql", "alchemy", "alchem"): "sqlalchemy",
-        ("tensorflow", "tf"): "tensorflow",
-        ("matplotlib", "mpl", "plt"): "matplotlib",
-        ("seaborn", "sea"): "seaborn",
-        ("pygame", "pyg", "game"): "pygame",
-        ("simplejson", "sjson", "json"): "simplejson",
-        ("wiki", "wikipedia"): "wikipedia",
-    }
-
-    url_overrides = {
-        "tensorflow": "https://github.com/mr-ubik/tensorflow-intersphinx/raw/master/tf2_py_objects.inv"
-    }
+    # The tables are shared with the benchmarks, which can't load the config
+    targets = rtfm.TARGETS
+    aliases = rtfm.ALIASES
+    url_overrides = rtfm.URL_OVERRIDES
 
     def __init__(self, bot: TechStruckBot) -> None:
         self.bot = bot
         self.cache = {}
+        self.inventories = rtfm.InventoryCache(bot_config.rtfm_cache_dir)
 
-    @property
-    def session(self) -> aiohttp.ClientSession:
-        return self.bot.http._HTTPClient__session  # type: ignore
+    @staticmethod
+    def parse(data: bytes, url: str) -> fuzzy.FinderIndex:
+        inventory = rtfm.SphinxObjectFileReader(data).parse_object_inv(url)
+        return fuzzy.FinderIndex(inventory.items(), key=itemgetter(0))
 
     async def build(self, target) -> None:
         url = self.targets[target]
-        req = await self.session.get(
-            self.url_overrides.get(target, url + "/objects.inv")
+        inventory_url = self.url_overrides.get(target, url + "/objects.inv")
+        loop = self.bot.loop
+        # Loading, parsing and saving big inventories takes long enough to
+        # hold up every other event, they run in threads
+        cached = await loop.run_in_executor(
+            None, self.inventories.load, target, inventory_url
         )
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        try:
+            req = await self.bot.http_pool.get("rtfm", inventory_url, headers=headers)
+        except (ClientError, asyncio.TimeoutError):
+            if cached is None:
+                raise
+            # The docs being down shouldn't stop searching the copy we have
+            self.cache[target] = cached.index
+            return
+
+        if req.status == 304 and cached is not None:
+            req.release()
+            self.cache[target] = cached.index
+            return
         if req.status != 200:
+            req.release()
             warnings.warn(
                 Warning(
-                    f"Received response with status code {req.status} when trying to build RTFM cache for {target} through {url}/objects.inv"
+                    f"Received response with status code {req.status} when trying to build RTFM cache for {target} through {inventory_url}"
                 )
             )
+            if cached is not None:
+                self.cache[target] = cached.index
+                return
             raise commands.CommandError("Failed to build RTFM cache")
-        self.cache[target] = rtfm.SphinxObjectFileReader(
-            await req.read()
-        ).parse_object_inv(url)
+
+        index = await loop.run_in_executor(None, self.parse, await req.read(), url)
+        self.cache[target] = index
+        await loop.run_in_executor(
+            None,
+            self.inventories.save,
+            target,
+            inventory_url,
+            req.headers.get("ETag"),
+            req.headers.get("Last-Modified"),
+            index,
+        )
 
     @commands.group(invoke_without_command=True)
     async def rtfm(self, ctx: commands.Context, doc: str, *, term: str = None):
@@ -110,7 +105,7 @@ class RTFM(commands.Cog):
             await self.build(target)
             cache = self.cache.get(target)
 
-        results = fuzzy.finder(term, list(cache.items()), key=lambda x: x[0], lazy=False)[:8]  # type: ignore
+        results = cache.search(term, limit=8)
 
         if not results:
             return await ctx.reply("Couldn't find any results")
@@ -6,7 +6,6 @@ import traceback
 from typing import Optional
 from urllib.parse import urlencode
 
-from cachetools import TTLCache
 from discord import Color, Embed, Forbidden, Member
 from discord.ext import commands, flags, tasks
 from jose import jwt
@@ -35,13 +34,9 @@ class Stackexchange(commands.Cog):
         self.bot = bot
         self.ready = False
         self.sites = None
-        self.token_cache = TTLCache(maxsize=1000, ttl=600)
+        self.bot.cache.add_namespace("stackexchange_tokens", maxsize=1000, ttl=600)
         self.load_sites.start()
 
-    @property
-    def session(self):
-        return self.bot.http._HTTPClient__session
-
     @tasks.loop(count=1)
     async def load_sites(self):
         if os.path.isfile("cache/stackexchange_sites.json"):
@@ -75,14 +70,14 @@ class Stackexchange(commands.Cog):
         if ctx.command == self.link_stackoverflow:
             return
 
-        token = self.token_cache.get(ctx.author.id)
+        token = await self.bot.cache.get("stackexchange_tokens", ctx.author.id)
         if not token:
             user = await UserModel.get_or_none(id=ctx.author.id)
             if user is None or user.stackoverflow_oauth_token is None:
                 raise StackExchangeNotLinkedError()
 
             token = user.stackoverflow_oauth_token
-            self.token_cache[ctx.author.id] = token
+            await self.bot.cache.set("stackexchange_tokens", ctx.author.id, token)
         ctx.stack_token = token  # type: ignore
 
     @flags.add_flag("--site", type=str, default="stackoverflow")
@@ -165,7 +160,9 @@ class Stackexchange(commands.Cog):
     @commands.command(aliases=["stacksites"])
     async def stacksite(self, ctx: commands.Context, *, term: str):
         """Search through list of stackexchange sites and find relevant ones"""
-        sites = fuzzy.finder(term, self.sites, key=lambda s: s["name"], lazy=False)[:5]  # type: ignore
+        sites = fuzzy.finder(
+            term, self.sites, key=lambda s: s["name"], lazy=False, limit=5
+        )
         embed = Embed(color=Color.blue())
         description = "\n".join(
             ["[`{0[name]}`]({0[site_url]})".format(site) for site in sites]
@@ -191,7 +188,8 @@ class Stackexchange(commands.Cog):
         data.update(stack_oauth_config.dict())
         if ctx:
             data["access_token"] = (ctx.stack_token,)
-        res = await self.session.request(
+        res = await self.bot.http_pool.request(
+            "stackexchange",
             method,
             f"https://api.stackexchange.com/2.2{endpoint}",
             params=params,
@@ -199,10 +197,24 @@ class Stackexchange(commands.Cog):
         )
 
         data = await res.json()
+        self.update_limits(data)
         if "error_message" in data:
             raise StackExchangeError(data["error_message"])
         return data
 
+    def update_limits(self, data: dict):
+        # The daily quota resets at midnight UTC
+        now = datetime.datetime.utcnow()
+        midnight = datetime.datetime.combine(
+            now.date() + datetime.timedelta(days=1), datetime.time()
+        )
+        self.bot.http_pool.limiter.update(
+            "stackexchange",
+            remaining=data.get("quota_remaining"),
+            reset_after=(midnight - now).total_seconds(),
+            backoff=data.get("backoff"),
+        )
+
     @commands.command(name="linkstack", aliases=["lnstack"])
     async def link_stackoverflow(self, ctx: commands.Context):
         """Link your stackoverflow account"""
@@ -1,11 +1,14 @@
 import asyncio
+import datetime
 from typing import Optional
 
-from discord import Color, Embed, Member, Reaction
-from discord.ext import commands
-from tortoise.functions import Count, Q
+from discord import Color, Embed, Member
+from discord.ext import commands, flags, tasks
 
-from models import ThankModel, UserModel
+from bot.utils.export import FORMATS, CompressedExport
+from bot.utils.paginator import ReactionPaginator
+from bot.utils.thanks import EXPORT_FIELDS, ThankStore
+from models import ThankModel
 
 delete_thank_message = """**Thanked**: <@!{0.thanked_id}>
 **Thanker**: <@!{0.thanker_id}>
@@ -13,16 +16,41 @@ delete_thank_message = """**Thanked**: <@!{0.thanked_id}>
 **Time**: {0.time}\n
 Confirmation required!"""
 
+LEADERBOARD_PAGE_SIZE = 10
+LIST_PAGE_SIZE = 10
+SEARCH_PAGE_SIZE = 10
+
 thank_list_message = """`{0.time:%D %T}` ID:`{0.id}`
 From: <@!{0.thanker_id}> ({0.thanker_id})
 Description: {0.description}\n"""
 
+thank_search_message = """`{0.time:%D %T}` ID:`{0.id}`
+<@!{0.thanker_id}> thanked <@!{0.thanked_id}>
+{0.headline}\n"""
+
 
 class Thank(commands.Cog):
     """Commands related to thanking members/helpers for help received"""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.store = ThankStore(bot.cache)
+        # Counts are shared by every cluster, one repairing them is enough
+        if bot.cluster_id == 0:
+            self.reconcile_counts.start()
+
+    def cog_unload(self):
+        self.reconcile_counts.cancel()
+
+    @tasks.loop(hours=6)
+    async def reconcile_counts(self):
+        guild_ids = await self.store.reconcile()
+        if guild_ids:
+            print(f"Repaired thank counts in {len(guild_ids)} guilds")
+
+    @reconcile_counts.before_loop
+    async def before_reconcile_counts(self):
+        await self.bot.db_ready.wait()
 
     @commands.group(invoke_without_command=True, aliases=["thanks", "rep"])
     @commands.cooldown(5, 300, commands.BucketType.user)
@@ -47,19 +75,9 @@ class Thank(commands.Cog):
                     title="Bruh", description="You can't thank a bot", color=Color.red()
                 )
             )
-        # TODO: Convert this to an expression (?) for efficiency
-        thanked, _ = await UserModel.get_or_create(id=recv.id)
-        thanker, _ = await UserModel.get_or_create(id=ctx.author.id)
-        await ThankModel.create(
-            thanker=thanker,
-            thanked=thanked,
-            description=description,
-            guild_id=ctx.guild.id,
-        )
+        await self.store.record(ctx.guild.id, ctx.author.id, recv.id, description)
         await ctx.send(
-            embed=Embed(
-                description=f"You thanked {recv.mention}!", color=0x6EFFFF
-            )
+            embed=Embed(description=f"You thanked {recv.mention}!", color=0x6EFFFF)
         )
 
     @thank.command(name="stats", aliases=["check"])
@@ -68,57 +86,71 @@ class Thank(commands.Cog):
     ):
         """View stats for thanks you've received and sent, in the current server and globally"""
         member = member or ctx.author
-        sent_thanks = await ThankModel.filter(thanker__id=member.id).count()
-        recv_thanks = await ThankModel.filter(thanked__id=member.id).count()
-        server_sent_thanks = await ThankModel.filter(
-            thanker__id=member.id, guild__id=ctx.guild.id
-        ).count()
-        server_recv_thanks = await ThankModel.filter(
-            thanked__id=member.id, guild__id=ctx.guild.id
-        ).count()
+        stats = await self.store.stats(ctx.guild.id, member.id)
 
         embed = Embed(title=f"Thank stats for: {member}", color=Color.green())
         embed.add_field(
             name="Thanks received",
-            value="Global: {}\nThis server: {}".format(recv_thanks, server_recv_thanks),
+            value="Global: {0.received}\nThis server: {0.guild_received}".format(stats),
         )
         embed.add_field(
             name="Thanks sent",
-            value="Global: {}\nThis server: {}".format(sent_thanks, server_sent_thanks),
+            value="Global: {0.sent}\nThis server: {0.guild_sent}".format(stats),
         )
         await ctx.send(embed=embed)
 
-    @thank.command(name="leaderboard", aliases=["lb"])
-    async def thank_leaderboard(self, ctx: commands.Context):
-        """View a leaderboard of top helpers in the current server"""
-        await ctx.trigger_typing()
-        lb = (
-            await UserModel.annotate(
-                thank_count=Count("thanks", _filter=Q(thanks__guild_id=ctx.guild.id))
-            )
-            .filter(thank_count__gt=0)
-            .order_by("-thank_count")
-            .limit(5)
+    @flags.add_flag("page", type=int, nargs="?", default=1)
+    @flags.add_flag("--week", action="store_true")
+    @flags.add_flag("--month", action="store_true")
+    @flags.add_flag("--since", type=datetime.date.fromisoformat)
+    @thank.command(cls=flags.FlagCommand, name="leaderboard", aliases=["lb"])
+    async def thank_leaderboard(self, ctx: commands.Context, **kwargs):
+        """
+        View a leaderboard of top helpers in the current server
+
+        Use --week or --month for the last 7 or 30 days, or --since YYYY-MM-DD
+        """
+        page = max(kwargs["page"], 1)
+        since: Optional[datetime.date] = kwargs["since"]
+        today = datetime.datetime.utcnow().date()
+        if kwargs["week"]:
+            since = today - datetime.timedelta(days=6)
+        elif kwargs["month"]:
+            since = today - datetime.timedelta(days=29)
+        lb = await self.store.leaderboard(
+            ctx.guild.id,
+            (page - 1) * LEADERBOARD_PAGE_SIZE,
+            LEADERBOARD_PAGE_SIZE,
+            since=since,
         )
-        if not lb:
+        if not lb.total:
             return await ctx.send(
                 embed=Embed(
                     title="Oopsy",
-                    description="There are no thanks here yet!",
+                    description=(
+                        "There are no thanks here yet!"
+                        if since is None
+                        else f"There are no thanks here since {since}!"
+                    ),
                     color=Color.red(),
                 )
             )
+        pages = -(-lb.total // LEADERBOARD_PAGE_SIZE)
+        if not lb.entries:
+            return await ctx.send(f"There are only {pages} pages")
         invis = "\u2800"
+        start = (page - 1) * LEADERBOARD_PAGE_SIZE
         embed = Embed(
-            title="LeaderBoard",
+            title="LeaderBoard" if since is None else f"LeaderBoard since {since}",
             color=Color.blue(),
             description="\n\n".join(
                 [
-                    f"**{m.thank_count} Thanks**{invis * (4 - len(str(m.thank_count)))}<@!{m.id}>"
-                    for m in lb
+                    f"`#{rank}` **{m.count} Thanks**{invis * (4 - len(str(m.count)))}<@!{m.user_id}>"
+                    for rank, m in enumerate(lb.entries, start + 1)
                 ]
             ),
         )
+        embed.set_footer(text=f"Page {page}/{pages}")
         await ctx.send(embed=embed)
 
     @thank.command(name="delete")
@@ -137,34 +169,94 @@ class Thank(commands.Cog):
         await msg.add_reaction("\u2705")
         await msg.add_reaction("\u274e")
 
-        def check(r: Reaction, u: Member):
-            return u.id == ctx.author.id and str(r.emoji) in ("\u2705", "\u274e")
-
         try:
-            r, _ = await self.bot.wait_for("reaction_add", check=check)
+            r, _ = await self.bot.waiters.wait_for_reaction(
+                msg.id,
+                timeout=60,
+                user_ids={ctx.author.id},
+                emojis=("\u2705", "\u274e"),
+            )
         except asyncio.TimeoutError:
             return await ctx.reply("Cancelled.")
         if str(r.emoji) == "\u2705":
-            await thank.delete()
+            if not await self.store.delete(thank):
+                return await ctx.reply("That thank was already deleted.")
             return await ctx.reply("Deleted.")
         return await ctx.reply("Cancelled.")
 
     @thank.command(name="list")
     @commands.has_guild_permissions(kick_members=True)
     async def list_thanks(self, ctx: commands.Context, member: Member):
-        """List the most recent 10 thanks received by a user in the current server"""
-        thanks = (
-            await ThankModel.filter(thanked_id=member.id, guild_id=ctx.guild.id)
-            .order_by("-time")
-            .limit(10)
-        )
+        """List the thanks received by a user in the current server, newest first"""
 
-        await ctx.send(
-            embed=Embed(
+        def fetch(cursor):
+            return self.store.list_received(
+                ctx.guild.id, member.id, cursor, LIST_PAGE_SIZE
+            )
+
+        def format_page(thanks, index):
+            return Embed(
                 title="Listing",
-                description="\n".join([thank_list_message.format(t) for t in thanks]),
+                description="\n".join([thank_list_message.format(t) for t in thanks])
+                or "No thanks received here yet",
                 color=Color.dark_blue(),
+            ).set_footer(text=f"Page {index + 1}")
+
+        await ReactionPaginator(ctx, fetch, format_page).start()
+
+    @thank.command(name="search")
+    @commands.has_guild_permissions(kick_members=True)
+    async def search_thanks(self, ctx: commands.Context, *, terms: str):
+        """Search the descriptions of the thanks in the current server"""
+
+        first = await self.store.search(ctx.guild.id, terms, 0, SEARCH_PAGE_SIZE)
+        # Also the case of terms that are all stopwords, they match nothing
+        if not first[0]:
+            return await ctx.send("No thanks found matching those terms")
+
+        async def fetch(offset):
+            if offset is None:
+                return first
+            return await self.store.search(
+                ctx.guild.id, terms, offset, SEARCH_PAGE_SIZE
             )
+
+        def format_page(results, index):
+            return Embed(
+                title=f"Thanks matching {terms}"[:256],
+                description="\n".join(
+                    [thank_search_message.format(r) for r in results]
+                ),
+                color=Color.dark_blue(),
+            ).set_footer(text=f"Page {index + 1}")
+
+        await ReactionPaginator(ctx, fetch, format_page).start()
+
+    @thank.command(name="export")
+    @commands.has_guild_permissions(kick_members=True)
+    @commands.cooldown(1, 600, commands.BucketType.guild)
+    async def export_thanks(self, ctx: commands.Context, fmt: str = "csv"):
+        """Export all the thanks of the current server as a gzipped CSV or JSON lines file"""
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            ctx.command.reset_cooldown(ctx)
+            return await ctx.send(f"Format must be one of {', '.join(FORMATS)}")
+        await ctx.trigger_typing()
+        export = CompressedExport(
+            f"thanks-{ctx.guild.id}",
+            fmt,
+            EXPORT_FIELDS,
+            max_size=ctx.guild.filesize_limit,
+        )
+        async for row in self.store.export(ctx.guild.id):
+            part = export.write(row)
+            if part is not None:
+                await ctx.send(file=part)
+        if not export.rows:
+            return await ctx.send("There are no thanks here yet!")
+        part = export.finish()
+        await ctx.send(
+            f"Exported {export.rows} thanks in {export.parts} parts", file=part
         )
 
 
@@ -1,14 +1,14 @@
 import platform
 import sys
+import time
+from collections import Counter
 
-import psutil
 from discord import Color, Embed, NotFound
 from discord import __version__ as discord_version
 from discord.ext import commands
 
-from models import GuildModel
-
 from .bot import TechStruckBot
+from .utils.cache_policy import rss
 
 
 class Common(commands.Cog):
@@ -23,7 +23,7 @@ class Common(commands.Cog):
             embed=Embed(title="Pong!", description=f"{latency}ms", color=Color.blue())
         )
 
-    @commands.command(aliases=["statistics"])
+    @commands.group(aliases=["statistics"], invoke_without_command=True)
     async def stats(self, ctx: commands.Context):
         """Stats of the bot"""
         users = len(self.bot.users)
@@ -36,8 +36,38 @@ class Common(commands.Cog):
             ("System", platform.release()),
             (
                 "Memory",
-                "{:.4} MB".format(psutil.Process().memory_info().rss / 1024 ** 2),
+                "{:.4} MB (started at {:.4} MB, ready at {})".format(
+                    rss() / 1024 ** 2,
+                    self.bot.startup_rss / 1024 ** 2,
+                    (
+                        "-"
+                        if self.bot.ready_rss is None
+                        else "{:.4} MB".format(self.bot.ready_rss / 1024 ** 2)
+                    ),
+                ),
+            ),
+            (
+                "Cache",
+                "{} members, {} messages, {}/{} guilds chunked".format(
+                    sum(len(g.members) for g in self.bot.guilds),
+                    len(self.bot.cached_messages),
+                    sum(g.chunked for g in self.bot.guilds),
+                    guilds,
+                ),
             ),
+            (
+                "Startup buffer",
+                "{0.replayed} replayed, {0.dropped} dropped".format(
+                    self.bot.startup_buffer
+                ),
+            ),
+            (
+                "Waiters",
+                "{reaction} reaction, {message} message".format(
+                    **self.bot.waiters.stats()
+                ),
+            ),
+            ("Raw event routes", len(self.bot.event_router)),
             ("Python version", ".".join([str(v) for v in sys.version_info[:3]])),
             ("Discord version", discord_version),
         )
@@ -48,6 +78,138 @@ class Common(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @stats.command(name="commands", aliases=["cmds"])
+    async def stats_commands(self, ctx: commands.Context, *, command: str = None):
+        """Latency percentiles and error rates of commands since the bot started"""
+        metrics = self.bot.command_metrics.commands
+        if command is not None:
+            stats = metrics.get(command)
+            if stats is None:
+                return await ctx.send("No invocations of that command recorded yet")
+            embed = Embed(
+                title=f"Stats for {command}",
+                description="Calls: {0.calls}\nErrors: {0.errors} ({1:.1%})".format(
+                    stats, stats.error_rate
+                ),
+                color=Color.dark_green(),
+            )
+            for name, hist in (
+                ("Total", stats.total),
+                ("Database", stats.db),
+                ("HTTP", stats.http),
+            ):
+                embed.add_field(
+                    name=name,
+                    value="\n".join(
+                        "**{}**: {:.1f}ms".format(label, value * 1000)
+                        for label, value in (
+                            ("p50", hist.percentile(50)),
+                            ("p95", hist.percentile(95)),
+                            ("p99", hist.percentile(99)),
+                            ("max", hist.max),
+                        )
+                    ),
+                )
+            return await ctx.send(embed=embed)
+
+        if not metrics:
+            return await ctx.send("No commands have been invoked yet")
+        header = "{:<20} {:>5} {:>7} {:>7} {:>7} {:>6} {:>6} {:>5}".format(
+            "Command", "Calls", "p50", "p95", "p99", "DB", "HTTP", "Err"
+        )
+        lines = [
+            "{:<20} {:>5} {:>7.0f} {:>7.0f} {:>7.0f} {:>6.0f} {:>6.0f} {:>5.0%}".format(
+                name[:20],
+                stats.calls,
+                stats.total.percentile(50) * 1000,
+                stats.total.percentile(95) * 1000,
+                stats.total.percentile(99) * 1000,
+                stats.db.mean * 1000,
+                stats.http.mean * 1000,
+                stats.error_rate,
+            )
+            for name, stats in sorted(
+                metrics.items(), key=lambda i: i[1].calls, reverse=True
+            )[:25]
+        ]
+        await ctx.send(
+            embed=Embed(
+                title="Command latencies (ms)",
+                description="```\n{}\n{}\n```".format(header, "\n".join(lines)),
+                color=Color.dark_green(),
+            ).set_footer(text="DB and HTTP are mean time spent per call")
+        )
+
+    @stats.command(name="http")
+    async def stats_http(self, ctx: commands.Context):
+        """Latency and connection pool usage per external host"""
+        pool = self.bot.http_pool
+        pool_stats = pool.pool_stats()
+        if not pool.hosts:
+            return await ctx.send("No external requests have been made yet")
+        header = "{:<28} {:>5} {:>6} {:>6} {:>4} {:>4} {:>4}".format(
+            "Host", "Reqs", "p50", "p95", "Err", "Use", "Idle"
+        )
+        lines = []
+        for host, stats in sorted(
+            pool.hosts.items(), key=lambda i: i[1].latency.count, reverse=True
+        )[:25]:
+            in_use, idle = pool_stats.get(host, (0, 0))
+            lines.append(
+                "{:<28} {:>5} {:>6.0f} {:>6.0f} {:>4} {:>4} {:>4}".format(
+                    host[:28],
+                    stats.latency.count,
+                    stats.latency.percentile(50) * 1000,
+                    stats.latency.percentile(95) * 1000,
+                    stats.errors,
+                    in_use,
+                    idle,
+                )
+            )
+        await ctx.send(
+            embed=Embed(
+                title="External HTTP (ms)",
+                description="```\n{}\n{}\n```".format(header, "\n".join(lines)),
+                color=Color.dark_green(),
+            )
+        )
+
+    @stats.command(name="shards", aliases=["cluster"])
+    async def stats_shards(self, ctx: commands.Context):
+        """Health of the shards run by this cluster"""
+        guild_counts = Counter(guild.shard_id for guild in self.bot.guilds)
+        now = time.time()
+        lines = []
+        for shard_id, latency in sorted(self.bot.latencies):
+            shard = self.bot.get_shard(shard_id)
+            connected_at = self.bot.shards_connected_at.get(shard_id)
+            lines.append(
+                "{:>5} {:>7} {:>7.0f} {:>8} {:>9}".format(
+                    shard_id,
+                    guild_counts[shard_id],
+                    latency * 1000,
+                    "closed" if shard is None or shard.is_closed() else "open",
+                    (
+                        "-"
+                        if connected_at is None
+                        else "{:.1f}h".format((now - connected_at) / 3600)
+                    ),
+                )
+            )
+        await ctx.send(
+            embed=Embed(
+                title=f"Cluster {self.bot.cluster_id}",
+                description="```\n{:>5} {:>7} {:>7} {:>8} {:>9}\n{}\n```".format(
+                    "Shard", "Guilds", "Ping", "State", "Uptime", "\n".join(lines)
+                ),
+                color=Color.dark_green(),
+            ).set_footer(
+                text="This message came from shard {} of {}".format(
+                    ctx.guild.shard_id if ctx.guild else 0, self.bot.shard_count
+                )
+            )
+        )
+
     @commands.command(aliases=["re"])
     async def redo(self, ctx: commands.Context):
         """Reply to a message to rerun it if its a command, helps when you've made typos"""
@@ -69,17 +231,41 @@ class Common(commands.Cog):
         """Set a custom prefix for the current server"""
         if len(prefix) > 10:
             return await ctx.send("Prefix too long, must be within 10 characters!")
-        self.bot.prefix_cache[ctx.guild.id] = prefix
-        await GuildModel.filter(id=ctx.guild.id).update(prefix=prefix)
+        await self.bot.guild_settings.set_prefix(ctx.guild.id, prefix)
         await ctx.send(f"My prefix has been updated to `{prefix}`")
 
     @commands.command()
     async def prefix(self, ctx: commands.Context):
         """View current prefix of bot"""
+        await ctx.send(f"My prefix here is `{self.bot.fetch_prefix(ctx.message)}`")
+
+    @commands.command(hidden=True, aliases=["loadtimes"])
+    @commands.is_owner()
+    async def extensiontimes(self, ctx: commands.Context):
+        """View how long each extension took to import and set up"""
+        loader = self.bot.extension_loader
+        lines = [
+            "{:<24} {:>8.1f} {:>8.1f}".format(
+                name, timing.import_time * 1000, timing.setup_time * 1000
+            )
+            for name, timing in sorted(
+                loader.timings.items(), key=lambda i: sum(i[1]), reverse=True
+            )
+        ]
+        lines.extend(
+            "{:<24} {:>8} {:>8}".format(name, "-", "-") for name in loader.pending
+        )
+        total = sum(sum(t) for t in loader.timings.values()) * 1000
         await ctx.send(
-            f"My prefix here is `"
-            + (self.bot.prefix_cache[ctx.guild.id] if ctx.guild else ".")
-            + "`"
+            embed=Embed(
+                title="Extension load times",
+                description="```\n{:<24} {:>8} {:>8}\n{}\n```".format(
+                    "Extension", "Import", "Setup", "\n".join(lines)
+                ),
+                color=Color.blue(),
+            ).set_footer(
+                text=f"Total: {total:.1f}ms, {len(loader.pending)} extensions not loaded yet"
+            )
         )
 
     @commands.command()
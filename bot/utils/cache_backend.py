@@ -0,0 +1,145 @@
+import asyncio
+import json
+import traceback
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import asyncpg
+from cachetools import TTLCache
+
+# Notification channel used to invalidate keys in every process
+INVALIDATION_CHANNEL = "cache_invalidate"
+
+InvalidationCallback = Callable[[Hashable], Optional[Awaitable[None]]]
+
+
+class CacheBackend(ABC):
+    """
+    Caches shared by every cluster of the bot
+
+    Values live in namespaces with their own size and TTL. Invalidating a key
+    removes it everywhere and runs the callbacks subscribed to its namespace,
+    which lets in-memory state owned by other objects be refreshed too.
+    """
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    def add_namespace(self, namespace: str, *, maxsize: int, ttl: float):
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribe(self, namespace: str, callback: InvalidationCallback):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, namespace: str, key: Hashable) -> Any:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, namespace: str, key: Hashable, value: Any):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def invalidate(self, namespace: str, key: Hashable, *, local: bool = True):
+        """
+        Drop the key everywhere and run the namespace's callbacks. With local
+        False this process' callbacks are skipped, for a writer that already
+        updated its own state.
+        """
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Cache local to the process, enough for a single cluster and for tests"""
+
+    def __init__(self):
+        self._caches: Dict[str, TTLCache] = {}
+        self._callbacks: Dict[str, List[InvalidationCallback]] = {}
+
+    def add_namespace(self, namespace: str, *, maxsize: int, ttl: float):
+        self._caches.setdefault(namespace, TTLCache(maxsize=maxsize, ttl=ttl))
+
+    def subscribe(self, namespace: str, callback: InvalidationCallback):
+        self._callbacks.setdefault(namespace, []).append(callback)
+
+    async def get(self, namespace: str, key: Hashable) -> Any:
+        return self._caches[namespace].get(key)
+
+    async def set(self, namespace: str, key: Hashable, value: Any):
+        self._caches[namespace][key] = value
+
+    async def invalidate(self, namespace: str, key: Hashable, *, local: bool = True):
+        await self._invalidate_local(namespace, key, callbacks=local)
+
+    async def _invalidate_local(
+        self, namespace: str, key: Hashable, *, callbacks: bool = True
+    ):
+        cache = self._caches.get(namespace)
+        if cache is not None:
+            cache.pop(key, None)
+        if not callbacks:
+            return
+        for callback in self._callbacks.get(namespace, ()):
+            try:
+                result = callback(key)
+                if result is not None:
+                    await result
+            except Exception:
+                traceback.print_exc()
+
+
+class PostgresCacheBackend(MemoryCacheBackend):
+    """
+    Process local cache kept coherent through postgres' LISTEN/NOTIFY
+
+    The database stays the source of truth, so only invalidations need to be
+    shared: each process drops its copy and loads it again when needed.
+    """
+
+    def __init__(self, credentials: Dict[str, Any]):
+        super().__init__()
+        self.credentials = credentials
+        self.origin = uuid.uuid4().hex
+        self._connection = None
+
+    async def start(self):
+        self._connection = await asyncpg.connect(**self.credentials)
+        await self._connection.add_listener(INVALIDATION_CHANNEL, self._on_notify)
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+
+    async def invalidate(self, namespace: str, key: Hashable, *, local: bool = True):
+        await self._invalidate_local(namespace, key, callbacks=local)
+        if self._connection is not None:
+            payload = json.dumps(
+                {"namespace": namespace, "key": key, "origin": self.origin}
+            )
+            await self._connection.execute(
+                "SELECT pg_notify($1, $2)", INVALIDATION_CHANNEL, payload
+            )
+
+    def _on_notify(self, connection, pid, channel: str, payload: str):
+        data = json.loads(payload)
+        if data.get("origin") == self.origin:
+            return
+        asyncio.get_event_loop().create_task(
+            self._invalidate_local(data["namespace"], data["key"])
+        )
+
+
+def make_cache_backend(kind: str, tortoise_config: dict) -> CacheBackend:
+    if kind == "memory":
+        return MemoryCacheBackend()
+    if kind == "postgres":
+        return PostgresCacheBackend(
+            tortoise_config["connections"]["default"]["credentials"]
+        )
+    raise ValueError(f"Unknown cache backend {kind}")
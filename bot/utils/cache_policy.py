@@ -0,0 +1,44 @@
+import asyncio
+from typing import Dict, Iterable, Optional
+
+import psutil
+from discord import Guild, Intents, Member, MemberCacheFlags
+
+
+def rss() -> int:
+    return psutil.Process().memory_info().rss
+
+
+class CachePolicy:
+    """
+    Gateway intents and member caching based on what the extensions need
+
+    Only the default intents and the privileged ones extensions declare are
+    requested. Members are never cached up front, guilds are chunked the first
+    time something needs their full member list and single members are
+    fetched on demand.
+    """
+
+    def __init__(self, required_intents: Iterable[str] = ()):
+        self.intents = Intents.default()
+        for name in required_intents:
+            setattr(self.intents, name, True)
+        self.member_cache_flags = MemberCacheFlags.none()
+        self._chunk_locks: Dict[int, asyncio.Lock] = {}
+
+    async def chunk(self, guild: Guild):
+        """Cache all members of the guild, if they aren't already"""
+        if guild.chunked:
+            return
+        lock = self._chunk_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            # Another caller may have chunked it while we waited
+            if not guild.chunked:
+                await guild.chunk(cache=True)
+
+    async def get_member(self, guild: Guild, user_id: int) -> Optional[Member]:
+        member = guild.get_member(user_id)
+        if member is None:
+            members = await guild.query_members(user_ids=[user_id], cache=True)
+            member = members[0] if members else None
+        return member
@@ -0,0 +1,213 @@
+import hashlib
+import math
+import traceback
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from cachetools import TTLCache
+from discord import AsyncWebhookAdapter, Color, Embed, TextChannel, Webhook, utils
+from discord.ext import commands, tasks
+
+if TYPE_CHECKING:
+    from bot.bot import TechStruckBot
+
+# Discord's limits for a single webhook message
+MAX_EMBEDS = 10
+MAX_EMBEDS_LENGTH = 6000
+# Only the tail of long tracebacks is kept so a report always fits in one message
+MAX_TRACEBACK_LENGTH = 3500
+CHUNK_SIZE = 1990
+
+
+def fingerprint(error: BaseException) -> str:
+    """Identify an error by its type and where it was raised, ignoring the message"""
+    error = getattr(error, "original", error)
+    frames = traceback.extract_tb(error.__traceback__)
+    key = "|".join(
+        [type(error).__qualname__]
+        + [f"{f.filename}:{f.name}:{f.lineno}" for f in frames]
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def build_report_embeds(ctx: commands.Context, error: BaseException) -> List[Embed]:
+    traceback_text = "".join(
+        traceback.format_exception(type(error), error, error.__traceback__)
+    )[-MAX_TRACEBACK_LENGTH:]
+
+    chunks = math.ceil(len(traceback_text) / CHUNK_SIZE)
+    traceback_texts = [
+        traceback_text[l * CHUNK_SIZE : (l + 1) * CHUNK_SIZE] for l in range(chunks)
+    ]
+    traceback_embeds = [
+        Embed(
+            title="Traceback",
+            description=("```py\n" + text + "\n```"),
+            color=Color.red(),
+        )
+        for text in traceback_texts
+    ]
+
+    # Add message content
+    info_embed = Embed(
+        title="Message content",
+        description="```\n"
+        + utils.escape_markdown(ctx.message.content)[:1000]
+        + "\n```",
+        color=Color.red(),
+    )
+    # Guild information
+    value = (
+        (
+            "**Name**: {0.name}\n"
+            "**ID**: {0.id}\n"
+            "**Created**: {0.created_at}\n"
+            "**Joined**: {0.me.joined_at}\n"
+            "**Member count**: {0.member_count}\n"
+            "**Permission integer**: {0.me.guild_permissions.value}"
+        ).format(ctx.guild)
+        if ctx.guild
+        else "None"
+    )
+
+    info_embed.add_field(name="Guild", value=value)
+    # Channel information
+    if isinstance(ctx.channel, TextChannel):
+        value = (
+            "**Type**: TextChannel\n"
+            "**Name**: {0.name}\n"
+            "**ID**: {0.id}\n"
+            "**Created**: {0.created_at}\n"
+            "**Permission integer**: {1}\n"
+        ).format(ctx.channel, ctx.channel.permissions_for(ctx.guild.me).value)
+    else:
+        value = (
+            "**Type**: DM\n" "**ID**: {0.id}\n" "**Created**: {0.created_at}\n"
+        ).format(ctx.channel)
+
+    info_embed.add_field(name="Channel", value=value)
+
+    # User info
+    value = (
+        "**Name**: {0}\n" "**ID**: {0.id}\n" "**Created**: {0.created_at}\n"
+    ).format(ctx.author)
+
+    info_embed.add_field(name="User", value=value)
+
+    return [*traceback_embeds, info_embed]
+
+
+class ErrorReport:
+    __slots__ = ("fingerprint", "name", "embeds", "count")
+
+    def __init__(self, fingerprint: str, name: str, embeds: List[Embed]):
+        self.fingerprint = fingerprint
+        self.name = name
+        self.embeds = embeds
+        self.count = 1
+
+    def finalize(self) -> List[Embed]:
+        if self.count > 1:
+            self.embeds[-1].set_footer(text=f"Occurred {self.count} times")
+        return self.embeds
+
+
+class ErrorReporter:
+    """
+    Queue of unexpected errors sent to the log webhook in the background
+
+    Errors are fingerprinted so repeats of a pending report only bump its count,
+    and repeats of an already sent report are collapsed into a summary. At most
+    one webhook message of up to 10 embeds is sent every `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        bot: "TechStruckBot",
+        webhook_url: str,
+        *,
+        interval: float,
+        dedupe_ttl: float = 3600,
+        max_pending: int = 100,
+    ):
+        self.bot = bot
+        self.webhook_url = webhook_url
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._webhook: Optional[Webhook] = None
+        self._pending: Dict[str, ErrorReport] = {}
+        # Fingerprints reported recently, mapped to their display name
+        self._sent = TTLCache(maxsize=1000, ttl=dedupe_ttl)
+        # Repeats of recently reported errors, summarised in the next batch
+        self._repeats: Dict[str, int] = {}
+        self.send_reports.change_interval(seconds=interval)
+        self.send_reports.start()
+
+    @property
+    def webhook(self) -> Webhook:
+        if self._webhook is None:
+            self._webhook = Webhook.from_url(
+                self.webhook_url, adapter=AsyncWebhookAdapter(self.bot.session)
+            )
+        return self._webhook
+
+    def report(self, ctx: commands.Context, error: BaseException):
+        fp = fingerprint(error)
+        if fp in self._pending:
+            self._pending[fp].count += 1
+        elif fp in self._sent:
+            self._repeats[fp] = self._repeats.get(fp, 0) + 1
+        elif len(self._pending) >= self.max_pending:
+            self.dropped += 1
+        else:
+            name = type(getattr(error, "original", error)).__name__
+            self._pending[fp] = ErrorReport(fp, name, build_report_embeds(ctx, error))
+
+    def _repeats_embed(self) -> Embed:
+        lines = [
+            f"`{fp[:8]}` {self._sent.get(fp, 'Unknown')}: {count} more"
+            for fp, count in self._repeats.items()
+        ]
+        if self.dropped:
+            lines.append(f"{self.dropped} reports dropped, queue was full")
+        return Embed(
+            title="Repeated errors",
+            description="\n".join(lines)[:4000],
+            color=Color.orange(),
+        )
+
+    def next_batch(self) -> List[Embed]:
+        batch: List[Embed] = []
+        length = 0
+        if self._repeats or self.dropped:
+            summary = self._repeats_embed()
+            self._repeats.clear()
+            self.dropped = 0
+            batch.append(summary)
+            length += len(summary)
+
+        for fp, report in list(self._pending.items()):
+            size = sum(len(e) for e in report.embeds)
+            if (
+                len(batch) + len(report.embeds) > MAX_EMBEDS
+                or length + size > MAX_EMBEDS_LENGTH
+            ):
+                break
+            del self._pending[fp]
+            self._sent[fp] = report.name
+            batch.extend(report.finalize())
+            length += size
+        return batch
+
+    @tasks.loop(seconds=5)
+    async def send_reports(self):
+        batch = self.next_batch()
+        if not batch:
+            return
+        try:
+            await self.webhook.send(embeds=batch)
+        except Exception:
+            traceback.print_exc()
+
+    @send_reports.before_loop
+    async def before_send_reports(self):
+        await self.bot.wait_until_ready()
@@ -0,0 +1,93 @@
+import asyncio
+import traceback
+from typing import Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from discord import RawReactionActionEvent
+
+RawReactionHandler = Callable[[RawReactionActionEvent], Awaitable[None]]
+
+REACTION_EVENTS = ("raw_reaction_add", "raw_reaction_remove")
+
+
+class RawEventRouter:
+    """
+    Routes raw reaction events to handlers registered for a message, channel or emoji
+
+    Cog listeners get every raw reaction of every guild and filter them
+    themselves, each one in its own task. Here an event is matched with a few
+    dict lookups and tasks are only created for the handlers it's routed to.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str, Hashable], List[RawReactionHandler]] = {}
+
+    @staticmethod
+    def _keys(events: Tuple[str, ...], **targets) -> List[Tuple[str, str, Hashable]]:
+        given = [(kind, value) for kind, value in targets.items() if value is not None]
+        if len(given) != 1:
+            raise TypeError("Exactly one of message_id, channel_id or emoji is needed")
+        ((kind, value),) = given
+        return [(event, kind, value) for event in events]
+
+    def add(
+        self,
+        handler: RawReactionHandler,
+        *,
+        message_id: int = None,
+        channel_id: int = None,
+        emoji: str = None,
+        events: Tuple[str, ...] = REACTION_EVENTS,
+    ):
+        for key in self._keys(
+            events, message=message_id, channel=channel_id, emoji=emoji
+        ):
+            self._routes.setdefault(key, []).append(handler)
+
+    def remove(
+        self,
+        handler: RawReactionHandler,
+        *,
+        message_id: int = None,
+        channel_id: int = None,
+        emoji: str = None,
+        events: Tuple[str, ...] = REACTION_EVENTS,
+    ):
+        for key in self._keys(
+            events, message=message_id, channel=channel_id, emoji=emoji
+        ):
+            handlers = self._routes.get(key, [])
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                self._routes.pop(key, None)
+
+    def remove_handler(self, handler: RawReactionHandler):
+        """Remove all the routes of a handler, for when its cog is unloaded"""
+        for key in list(self._routes):
+            handlers = [h for h in self._routes[key] if h != handler]
+            if handlers:
+                self._routes[key] = handlers
+            else:
+                del self._routes[key]
+
+    def dispatch(self, event: str, payload: RawReactionActionEvent):
+        routes = self._routes
+        if not routes:
+            return
+        for key in (
+            (event, "message", payload.message_id),
+            (event, "channel", payload.channel_id),
+            (event, "emoji", str(payload.emoji)),
+        ):
+            for handler in routes.get(key, ()):
+                asyncio.get_event_loop().create_task(self._run(handler, payload))
+
+    @staticmethod
+    async def _run(handler: RawReactionHandler, payload: RawReactionActionEvent):
+        try:
+            await handler(payload)
+        except Exception:
+            traceback.print_exc()
+
+    def __len__(self) -> int:
+        return sum(map(len, self._routes.values()))
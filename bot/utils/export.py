@@ -0,0 +1,77 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+from typing import Any, Dict, Optional, Sequence
+
+from discord import File
+
+FORMATS = ("csv", "jsonl")
+
+# Compressed data can sit in the compressor before reaching the buffer, parts
+# are closed this far below the size limit to stay under it
+SIZE_MARGIN = 1024**2
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Can't serialize {type(value).__name__}")
+
+
+class CompressedExport:
+    """
+    Writes rows to gzip compressed CSV or JSON lines files
+
+    A part is finished once it gets close to `max_size` and a new one started,
+    so only the part being written is ever held in memory.
+    """
+
+    def __init__(
+        self, name: str, fmt: str, fieldnames: Sequence[str], *, max_size: int
+    ):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format {fmt}")
+        self.name = name
+        self.fmt = fmt
+        self.fieldnames = fieldnames
+        self.max_size = max(max_size - SIZE_MARGIN, max_size // 2)
+        self.parts = 0
+        self.rows = 0
+        self._start_part()
+
+    def _start_part(self):
+        self.parts += 1
+        self._buffer = io.BytesIO()
+        self._gzip = gzip.GzipFile(fileobj=self._buffer, mode="wb")
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8", newline="")
+        self._part_rows = 0
+        if self.fmt == "csv":
+            self._csv = csv.DictWriter(self._text, self.fieldnames)
+            self._csv.writeheader()
+
+    def _finish_part(self) -> File:
+        self._text.flush()
+        self._text.detach()
+        self._gzip.close()
+        self._buffer.seek(0)
+        return File(self._buffer, f"{self.name}-{self.parts}.{self.fmt}.gz")
+
+    def write(self, row: Dict[str, Any]) -> Optional[File]:
+        """Write a row, returns the previous part if it had to be finished"""
+        finished = None
+        if self._part_rows and self._buffer.tell() >= self.max_size:
+            finished = self._finish_part()
+            self._start_part()
+        if self.fmt == "csv":
+            self._csv.writerow(row)
+        else:
+            self._text.write(json.dumps(row, default=_json_default) + "\n")
+        self._part_rows += 1
+        self.rows += 1
+        return finished
+
+    def finish(self) -> File:
+        """Finish the last part, it always has a row unless nothing was written"""
+        return self._finish_part()
@@ -0,0 +1,77 @@
+import importlib
+import time
+import traceback
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple
+
+from discord.ext import commands
+
+if TYPE_CHECKING:
+    from bot.bot import TechStruckBot
+
+
+class ExtensionTiming(NamedTuple):
+    import_time: float
+    setup_time: float
+
+
+class ExtensionLoader:
+    """
+    Loads extensions either eagerly or lazily and records how long each one took
+
+    Lazy extensions get a hidden stub command registered for each of their top
+    level command names, the real extension is only imported the first time
+    one of those stubs is invoked, after which the message is invoked again.
+    Help loads every pending extension, stubs don't have the real commands'
+    help to show.
+    """
+
+    def __init__(self, bot: "TechStruckBot"):
+        self.bot = bot
+        self.timings: Dict[str, ExtensionTiming] = {}
+        self.pending: Dict[str, List[str]] = {}
+
+    def load(self, name: str):
+        start = time.perf_counter()
+        # Importing first warms up the extension's dependencies, which is
+        # where nearly all the cost is. load_extension executes the module
+        # itself again, so the second part is the module body and setup
+        importlib.import_module(name)
+        imported = time.perf_counter()
+        self.bot.load_extension(name)
+        self.timings[name] = ExtensionTiming(
+            imported - start, time.perf_counter() - imported
+        )
+
+    def add_lazy(self, name: str, command_names: Iterable[str]):
+        self.pending[name] = list(command_names)
+        for command_name in self.pending[name]:
+            self.bot.add_command(self._make_stub(name, command_name))
+
+    def load_pending(self, name: str):
+        if name not in self.pending:
+            return
+        command_names = self.pending.pop(name)
+        for command_name in command_names:
+            self.bot.remove_command(command_name)
+        try:
+            self.load(name)
+        except Exception:
+            self.add_lazy(name, command_names)
+            raise
+
+    def load_all_pending(self):
+        for name in list(self.pending):
+            try:
+                self.load_pending(name)
+            except Exception:
+                traceback.print_exc()
+
+    def _make_stub(self, name: str, command_name: str) -> commands.Command:
+        async def stub(ctx: commands.Context, *, _: str = None):
+            self.load_pending(name)
+            await self.bot.invoke(await self.bot.get_context(ctx.message))
+
+        command = commands.Command(stub, name=command_name, hidden=True)
+        # The real command it invokes is the one counted in the metrics
+        command.skip_metrics = True  # type: ignore
+        return command
@@ -10,7 +10,10 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import heapq
 import re
+import string
+from collections import Counter
 from difflib import SequenceMatcher
+from functools import lru_cache
 
 
 def ratio(a, b):
@@ -69,7 +72,165 @@ def partial_token_sort_ratio(a, b):
     return partial_ratio(a, b)
 
 
+# Scoring one query against a whole choice set at once. The characters of each
+# choice are counted once, which is all quick_ratio needs, so its scores are
+# the same as difflib's without building a SequenceMatcher for every choice.
+# difflib's ratio never beats its quick_ratio, so for ratio the counts are an
+# upper bound used to skip choices that can't make it to the results, and the
+# others are still scored with difflib. partial scores are always difflib's.
+
+# Smaller choice sets are scored with difflib, encoding them isn't worth it
+BATCH_MIN_CHOICES = 32
+
+
+class ChoiceSet:
+    """
+    Choices for extract and friends, encoded once to be scored in batches
+
+    Takes a mapping or an iterable like the functions do. Build one for
+    choices searched many times, other large choices are encoded on each call.
+    """
+
+    def __init__(self, choices):
+        try:
+            self.keys = list(choices.keys())
+            self.values = list(choices.values())
+        except AttributeError:
+            self.keys = list(choices)
+            self.values = None
+        self._sorted_keys = None
+        self._counters = None
+        self._sorted_counters = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def sorted_keys(self):
+        if self._sorted_keys is None:
+            self._sorted_keys = [_sort_tokens(key) for key in self.keys]
+        return self._sorted_keys
+
+    def counters(self):
+        if self._counters is None:
+            self._counters = [Counter(key) for key in self.keys]
+        return self._counters
+
+    def sorted_counters(self):
+        if self._sorted_counters is None:
+            self._sorted_counters = [Counter(key) for key in self.sorted_keys()]
+        return self._sorted_counters
+
+    def result(self, index, score):
+        if self.values is None:
+            return (self.keys[index], score)
+        return (self.keys[index], score, self.values[index])
+
+
+def _score(matches, length):
+    # Same as difflib's ratio
+    return int(round(100 * (2.0 * matches / length if length else 1.0)))
+
+
+def _batch_quick_ratio(query, keys, counters):
+    # Returns a function scoring the key at an index
+    wanted = Counter(query).items()
+    length = len(query)
+
+    def score(index):
+        counter = counters[index]
+        matches = sum(min(n, counter.get(c, 0)) for c, n in wanted)
+        return _score(matches, length + len(keys[index]))
+
+    return score
+
+
+# The scalar scorer used on keys, on sorted tokens for the token_sort ones,
+# and whether quick_ratio bounds its scores
+_BATCH_SCORERS = {
+    ratio: (ratio, False, True),
+    quick_ratio: (quick_ratio, False, True),
+    partial_ratio: (partial_ratio, False, False),
+    token_sort_ratio: (ratio, True, True),
+    quick_token_sort_ratio: (quick_ratio, True, True),
+    partial_token_sort_ratio: (partial_ratio, True, False),
+}
+
+
+def _batch_scorer(query, choices, scorer):
+    # Returns the query and keys compared, a function giving an upper bound of
+    # the score of a key or None, and the function scoring a key
+    base, sort_tokens, bounded = _BATCH_SCORERS[scorer]
+    if sort_tokens:
+        query = _sort_tokens(query)
+        keys = choices.sorted_keys()
+    else:
+        keys = choices.keys
+    if not bounded:
+        return query, keys, None, lambda index: base(query, keys[index])
+    counters = choices.sorted_counters() if sort_tokens else choices.counters()
+    quick = _batch_quick_ratio(query, keys, counters)
+    if base is quick_ratio:
+        return query, keys, None, quick
+    return query, keys, quick, lambda index: base(query, keys[index])
+
+
+def _batch_choices(choices, scorer):
+    if scorer not in _BATCH_SCORERS:
+        return None
+    if isinstance(choices, ChoiceSet):
+        return choices
+    try:
+        large = len(choices) >= BATCH_MIN_CHOICES
+    except TypeError:
+        return None
+    return ChoiceSet(choices) if large else None
+
+
+def _batch_top(query, choices, scorer, score_cutoff, limit):
+    # The same as heapq.nlargest over the scores, but a choice is only scored
+    # if its upper bound could make it to the top. Matches can't outnumber the
+    # characters of the shorter string, which bounds every scorer but partial.
+    bounded = _BATCH_SCORERS[scorer][2]
+    query, keys, upper, score = _batch_scorer(query, choices, scorer)
+    top = []
+
+    def hopeless(bound):
+        return bound < score_cutoff or (len(top) == limit and bound <= top[0][0])
+
+    for index, key in enumerate(keys):
+        if bounded and hopeless(
+            _score(min(len(query), len(key)), len(query) + len(key))
+        ):
+            continue
+        if upper is not None and hopeless(upper(index)):
+            continue
+        value = score(index)
+        if value < score_cutoff:
+            continue
+        # Earlier choices win ties, like with nlargest
+        if len(top) < limit:
+            heapq.heappush(top, (value, -index))
+        elif value > top[0][0]:
+            heapq.heapreplace(top, (value, -index))
+    return [choices.result(-index, value) for value, index in sorted(top, reverse=True)]
+
+
 def _extraction_generator(query, choices, scorer=quick_ratio, score_cutoff=0):
+    batch = _batch_choices(choices, scorer)
+    if batch is not None:
+        _, keys, upper, score = _batch_scorer(query, batch, scorer)
+        for index in range(len(keys)):
+            if upper is not None and upper(index) < score_cutoff:
+                continue
+            value = score(index)
+            if value >= score_cutoff:
+                yield batch.result(index, value)
+        return
+    if isinstance(choices, ChoiceSet):
+        if choices.values is not None:
+            choices = dict(zip(choices.keys, choices.values))
+        else:
+            choices = choices.keys
     try:
         for key, value in choices.items():
             score = scorer(query, key)
@@ -83,6 +244,10 @@ def _extraction_generator(query, choices, scorer=quick_ratio, score_cutoff=0):
 
 
 def extract(query, choices, *, scorer=quick_ratio, score_cutoff=0, limit=10):
+    if limit is not None and limit > 0:
+        batch = _batch_choices(choices, scorer)
+        if batch is not None:
+            return _batch_top(query, batch, scorer, score_cutoff, limit)
     it = _extraction_generator(query, choices, scorer, score_cutoff)
     key = lambda t: t[1]
     if limit is not None:
@@ -91,6 +256,10 @@ def extract(query, choices, *, scorer=quick_ratio, score_cutoff=0, limit=10):
 
 
 def extract_one(query, choices, *, scorer=quick_ratio, score_cutoff=0):
+    batch = _batch_choices(choices, scorer)
+    if batch is not None:
+        top = _batch_top(query, batch, scorer, score_cutoff, 1)
+        return top[0] if top else None
     it = _extraction_generator(query, choices, scorer, score_cutoff)
     key = lambda t: t[1]
     try:
@@ -145,30 +314,134 @@ def extract_matches(query, choices, *, scorer=quick_ratio, score_cutoff=0):
     return to_return
 
 
-def finder(text, collection, *, key=None, lazy=True):
-    suggestions = []
-    text = str(text)
+def _suggestions(text, pairs):
+    # Matches of text in (key, item) pairs, ordered as finder orders them.
+    # The index makes ties keep the order of the collection.
     pat = ".*?".join(map(re.escape, text))
     regex = re.compile(pat, flags=re.IGNORECASE)
-    for item in collection:
-        to_search = key(item) if key else item
+    for index, (to_search, item) in enumerate(pairs):
         r = regex.search(to_search)
         if r:
-            suggestions.append((len(r.group()), r.start(), item))
+            yield (len(r.group()), r.start(), to_search, index, item)
+
+
+def _lazy_sorted(suggestions):
+    heapq.heapify(suggestions)
+    while suggestions:
+        yield heapq.heappop(suggestions)[-1]
 
-    def sort_key(tup):
-        if key:
-            return tup[0], tup[1], key(tup[2])
-        return tup
 
+def _ordered(suggestions, lazy, limit):
+    if limit is not None:
+        # A bounded heap, the same as sorting and slicing
+        results = [s[-1] for s in heapq.nsmallest(limit, suggestions)]
+        return iter(results) if lazy else results
     if lazy:
-        return (z for _, _, z in sorted(suggestions, key=sort_key))
-    else:
-        return [z for _, _, z in sorted(suggestions, key=sort_key)]
+        # Only the suggestions actually consumed get sorted
+        return _lazy_sorted(list(suggestions))
+    return [s[-1] for s in sorted(suggestions)]
+
+
+def finder(text, collection, *, key=None, lazy=True, limit=None):
+    pairs = ((key(item) if key else item, item) for item in collection)
+    return _ordered(_suggestions(str(text), pairs), lazy, limit)
 
 
 def find(text, collection, *, key=None):
     try:
-        return finder(text, collection, key=key, lazy=False)[0]
+        return finder(text, collection, key=key, lazy=False, limit=1)[0]
     except IndexError:
         return None
+
+
+# Occurrences of a character counted by the finder index, queries repeating a
+# character more than this are only narrowed down by the first few
+_MAX_REPEAT = 3
+
+_SET_BITS = tuple(tuple(b for b in range(8) if byte >> b & 1) for byte in range(256))
+
+
+@lru_cache(maxsize=None)
+def _ascii_folds(char):
+    # Lowercase ASCII characters a case-insensitive regex would match against
+    # char, like "s" for the long s
+    if char.isascii():
+        return (char.lower(),)
+    return tuple(
+        c for c in string.ascii_lowercase if re.fullmatch(c, char, flags=re.IGNORECASE)
+    )
+
+
+class FinderIndex:
+    """
+    A prebuilt index for `finder` over a collection searched many times
+
+    `finder` runs its regex on every item for every query. Matching needs an
+    item to contain every character of the query (as many times as it's
+    repeated), so items are indexed by the characters they contain as bitsets
+    and a search only runs the regex on items that have all of them. Results
+    are the same as `finder(text, collection, key=key, lazy=False)`.
+    """
+
+    def __init__(self, collection=(), *, key=None):
+        self.key = key
+        self.items = []
+        self.keys = []
+        self._masks = {}
+        self.extend(collection)
+
+    def __len__(self):
+        return len(self.items)
+
+    def extend(self, collection):
+        start = len(self.items)
+        postings = {}
+        for i, item in enumerate(collection):
+            to_search = self.key(item) if self.key else item
+            self.items.append(item)
+            self.keys.append(to_search)
+            if to_search.isascii():
+                counts = Counter(to_search.lower())
+            else:
+                counts = Counter()
+                for char, count in Counter(to_search).items():
+                    for folded in _ascii_folds(char):
+                        counts[folded] += count
+            for char, count in counts.items():
+                for n in range(1, min(count, _MAX_REPEAT) + 1):
+                    postings.setdefault((char, n), []).append(i)
+
+        size = len(self.items) - start
+        for posting, ids in postings.items():
+            bits = bytearray((size + 7) // 8)
+            for i in ids:
+                bits[i >> 3] |= 1 << (i & 7)
+            mask = int.from_bytes(bits, "little") << start
+            self._masks[posting] = self._masks.get(posting, 0) | mask
+
+    def add(self, item):
+        self.extend((item,))
+
+    def _candidates(self, text):
+        counts = Counter(c.lower() for c in text if c.isascii())
+        mask = (1 << len(self.items)) - 1
+        for char, count in counts.items():
+            mask &= self._masks.get((char, min(count, _MAX_REPEAT)), 0)
+            if not mask:
+                return
+        for index, byte in enumerate(
+            mask.to_bytes((len(self.items) + 7) // 8, "little")
+        ):
+            for bit in _SET_BITS[byte]:
+                i = index * 8 + bit
+                yield self.keys[i], self.items[i]
+
+    def search(self, text, *, limit=None):
+        text = str(text)
+        return _ordered(_suggestions(text, self._candidates(text)), False, limit)
+
+    def find(self, text):
+        try:
+            return self.search(text, limit=1)[0]
+        except IndexError:
+            return None
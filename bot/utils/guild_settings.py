@@ -0,0 +1,55 @@
+from typing import Callable, Dict, Optional
+
+from models import GuildModel
+
+from .cache_backend import CacheBackend
+
+
+class GuildSettings:
+    """
+    In memory store of guild settings
+
+    Only guilds with non-default settings have a row worth caching, all of them
+    are loaded in a single query on startup. A guild without a row simply uses
+    the defaults until a setting is changed or a thank references it.
+    Changes are announced through the cache backend so other clusters reload them.
+    """
+
+    default_prefix = "."
+
+    def __init__(self, cache: CacheBackend):
+        self.cache = cache
+        self._prefixes: Dict[int, str] = {}
+        cache.subscribe("guild_settings", self.reload)
+
+    async def preload(self, owns_guild: Callable[[int], bool] = lambda _: True):
+        rows = await GuildModel.exclude(prefix=self.default_prefix).values_list(
+            "id", "prefix"
+        )
+        self._prefixes = {
+            guild_id: prefix for guild_id, prefix in rows if owns_guild(guild_id)
+        }
+
+    async def reload(self, guild_id: int):
+        guild = await GuildModel.get_or_none(id=guild_id)
+        if guild is None or guild.prefix == self.default_prefix:
+            self._prefixes.pop(guild_id, None)
+        else:
+            self._prefixes[guild_id] = guild.prefix
+
+    def get_prefix(self, guild_id: Optional[int]) -> str:
+        if guild_id is None:
+            return self.default_prefix
+        return self._prefixes.get(guild_id, self.default_prefix)
+
+    async def set_prefix(self, guild_id: int, prefix: str):
+        if prefix == self.default_prefix:
+            # A guild without a row already uses the default, and rows can't be
+            # deleted as thanks reference them
+            await GuildModel.filter(id=guild_id).update(prefix=prefix)
+            self._prefixes.pop(guild_id, None)
+        else:
+            await GuildModel.update_or_create(id=guild_id, defaults={"prefix": prefix})
+            self._prefixes[guild_id] = prefix
+        # Already up to date here, only the other clusters need to reload
+        await self.cache.invalidate("guild_settings", guild_id, local=False)
@@ -0,0 +1,150 @@
+import time
+from types import SimpleNamespace
+from typing import Dict, Hashable, Optional, Tuple
+
+from aiohttp import (
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+)
+
+from .metrics import Histogram, http_trace_config
+from .ratelimit import ServiceLimiter
+
+DEFAULT_TIMEOUT = ClientTimeout(total=15, connect=5)
+
+# Default timeouts of the external services used by the cogs
+SERVICE_TIMEOUTS: Dict[str, ClientTimeout] = {
+    "codingame": ClientTimeout(total=10, connect=5),
+    "crates": ClientTimeout(total=10, connect=5),
+    "github": ClientTimeout(total=10, connect=5),
+    # SVGs are rendered on demand and can be slow
+    "github_stats": ClientTimeout(total=20, connect=5),
+    "npm": ClientTimeout(total=10, connect=5),
+    # Code execution may legitimately take a while
+    "piston": ClientTimeout(total=30, connect=5),
+    "pypi": ClientTimeout(total=10, connect=5),
+    # Inventories of large projects are several megabytes
+    "rtfm": ClientTimeout(total=30, connect=5),
+    "stackexchange": ClientTimeout(total=10, connect=5),
+}
+
+
+class HostStats:
+    __slots__ = ("latency", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+
+
+class HTTPPool:
+    """
+    HTTP client owned by the bot for all requests to external services
+
+    Keeps these requests off discord.py's own session with a tuned connection
+    pool, DNS caching, keep-alive and per service default timeouts, and keeps
+    latency stats per host. Requests are also rate limited per service
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        timeouts: Dict[str, ClientTimeout] = SERVICE_TIMEOUTS,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeouts = timeouts
+        self.hosts: Dict[str, HostStats] = {}
+        self.limiter = ServiceLimiter()
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def session(self) -> ClientSession:
+        # Created lazily so that it's bound to the running loop
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+                enable_cleanup_closed=True,
+            )
+            self._session = ClientSession(
+                connector=connector,
+                timeout=DEFAULT_TIMEOUT,
+                trace_configs=[http_trace_config(), self._stats_trace_config()],
+            )
+        return self._session
+
+    def _host(self, host: Optional[str]) -> HostStats:
+        stats = self.hosts.get(host or "")
+        if stats is None:
+            stats = self.hosts[host or ""] = HostStats()
+        return stats
+
+    def _stats_trace_config(self) -> TraceConfig:
+        async def on_request_start(session, ctx: SimpleNamespace, params):
+            ctx.start = time.perf_counter()
+
+        async def on_request_end(session, ctx: SimpleNamespace, params):
+            self._host(params.url.host).latency.add(time.perf_counter() - ctx.start)
+
+        async def on_request_exception(session, ctx: SimpleNamespace, params):
+            self._host(params.url.host).errors += 1
+
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+    async def request(
+        self,
+        service: str,
+        method: str,
+        url: str,
+        *,
+        ratelimit_key: Hashable = None,
+        **kwargs,
+    ) -> ClientResponse:
+        kwargs.setdefault("timeout", self.timeouts.get(service, DEFAULT_TIMEOUT))
+        await self.limiter.acquire(service, ratelimit_key)
+        res = await self.session.request(method, url, **kwargs)
+        self.limiter.update_from_headers(
+            service, ratelimit_key, res.status, res.headers
+        )
+        return res
+
+    async def get(self, service: str, url: str, **kwargs) -> ClientResponse:
+        return await self.request(service, "GET", url, **kwargs)
+
+    async def post(self, service: str, url: str, **kwargs) -> ClientResponse:
+        return await self.request(service, "POST", url, **kwargs)
+
+    def pool_stats(self) -> Dict[str, Tuple[int, int]]:
+        """Connections in use and idle connections kept alive, per host"""
+        if self._session is None:
+            return {}
+        connector: TCPConnector = self._session.connector  # type: ignore
+        stats: Dict[str, Tuple[int, int]] = {}
+        # aiohttp doesn't expose these publicly
+        for key, acquired in connector._acquired_per_host.items():
+            in_use, idle = stats.get(key.host, (0, 0))
+            stats[key.host] = (in_use + len(acquired), idle)
+        for key, conns in connector._conns.items():
+            in_use, idle = stats.get(key.host, (0, 0))
+            stats[key.host] = (in_use, idle + len(conns))
+        return stats
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
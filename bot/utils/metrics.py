@@ -0,0 +1,171 @@
+import bisect
+import functools
+import time
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+from aiohttp import TraceConfig
+from discord.ext import commands
+
+# Upper bounds of the histogram buckets in seconds, each 10% wider than the
+# previous, from 1ms to a bit over 2 minutes
+BUCKETS: Tuple[float, ...] = tuple(0.001 * 1.1**i for i in range(125))
+
+DB_METHODS = (
+    "execute_insert",
+    "execute_many",
+    "execute_query",
+    "execute_query_dict",
+    "execute_script",
+)
+
+
+class Histogram:
+    """Fixed log-bucketed latency histogram, percentiles are bucket upper bounds"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class InvocationTiming:
+    __slots__ = ("started", "db", "http")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.http = 0.0
+
+
+class CommandStats:
+    __slots__ = ("total", "db", "http", "errors")
+
+    def __init__(self):
+        self.total = Histogram()
+        self.db = Histogram()
+        self.http = Histogram()
+        self.errors = 0
+
+    @property
+    def calls(self) -> int:
+        return self.total.count
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
+
+_current_timing: ContextVar[Optional[InvocationTiming]] = ContextVar(
+    "current_timing", default=None
+)
+
+
+def record_db(seconds: float):
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.db += seconds
+
+
+def record_http(seconds: float):
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.http += seconds
+
+
+def _timed_db_method(method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            record_db(time.perf_counter() - start)
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def instrument_db_client(cls: type):
+    """Time the query methods of a tortoise client class and all its subclasses"""
+    for name in DB_METHODS:
+        method = cls.__dict__.get(name)
+        if method is not None and not getattr(method, "__timed__", False):
+            setattr(cls, name, _timed_db_method(method))
+    for subclass in cls.__subclasses__():
+        instrument_db_client(subclass)
+
+
+def http_trace_config() -> TraceConfig:
+    """aiohttp trace config adding the time of each request to the current command"""
+
+    async def on_request_start(session, ctx: SimpleNamespace, params):
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(session, ctx: SimpleNamespace, params):
+        record_http(time.perf_counter() - ctx.start)
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_end)
+    return trace_config
+
+
+class CommandMetrics:
+    """Per command latency histograms, fed by the bot's invoke hooks"""
+
+    def __init__(self):
+        self.commands: Dict[str, CommandStats] = {}
+
+    async def before_invoke(self, ctx: commands.Context):
+        # Commands like the stubs of lazy extensions invoke the real command
+        # again, which records the invocation instead
+        if getattr(ctx.command, "skip_metrics", False):
+            return
+        # Runs again for the subcommand of a group, the timing started by the
+        # parent is kept so its work counts too
+        timing = getattr(ctx, "invocation_timing", None)
+        if timing is None:
+            timing = ctx.invocation_timing = InvocationTiming()  # type: ignore
+        _current_timing.set(timing)
+
+    async def after_invoke(self, ctx: commands.Context):
+        timing: Optional[InvocationTiming] = getattr(ctx, "invocation_timing", None)
+        if timing is None:
+            return
+        name = ctx.command.qualified_name
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        stats.total.add(time.perf_counter() - timing.started)
+        stats.db.add(timing.db)
+        stats.http.add(timing.http)
+        if ctx.command_failed:
+            stats.errors += 1
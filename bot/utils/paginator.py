@@ -0,0 +1,115 @@
+import asyncio
+import contextlib
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+from discord import Embed, Forbidden, NotFound
+from discord.ext import commands
+
+_T = TypeVar("_T")
+_C = TypeVar("_C")
+
+# Fetches the page at the given cursor (None for the first page), returns its
+# items and the cursor of the next page, None if it's the last one
+PageFetcher = Callable[[Optional[_C]], Awaitable[Tuple[List[_T], Optional[_C]]]]
+
+PREVIOUS = "\u25c0\ufe0f"
+NEXT = "\u25b6\ufe0f"
+STOP = "\u23f9\ufe0f"
+
+
+class ReactionPaginator(Generic[_T, _C]):
+    """
+    Pages through results fetched a page at a time, controlled with reactions
+
+    Pages are fetched with a cursor to the next one, so they can come from
+    keyset queries. The next page is fetched in the background while the
+    current one is shown and visited pages are kept to go back to them.
+    """
+
+    def __init__(
+        self,
+        ctx: commands.Context,
+        fetch: PageFetcher,
+        format_page: Callable[[List[_T], int], Embed],
+        *,
+        timeout: float = 120,
+    ):
+        self.ctx = ctx
+        self.fetch = fetch
+        self.format_page = format_page
+        self.timeout = timeout
+        self.pages: List[List[_T]] = []
+        # Cursor of the page after each fetched page
+        self.cursors: List[Optional[_C]] = []
+        # Set once a fetch says there are no more pages
+        self.exhausted = False
+        self._prefetch: Optional[asyncio.Task] = None
+
+    @property
+    def has_next(self) -> bool:
+        return not self.exhausted
+
+    async def _fetch_next(self):
+        items, cursor = await self.fetch(self.cursors[-1] if self.cursors else None)
+        if items:
+            self.pages.append(items)
+            self.cursors.append(cursor)
+            self.exhausted = cursor is None
+        else:
+            # Either there are no results at all or the previous page was
+            # exactly the last one
+            self.exhausted = True
+            if self.cursors:
+                self.cursors[-1] = None
+
+    def _start_prefetch(self, index: int):
+        # Only the page after the last fetched one is worth fetching ahead
+        if index == len(self.pages) - 1 and self.has_next:
+            self._prefetch = asyncio.get_event_loop().create_task(self._fetch_next())
+
+    async def _page(self, index: int) -> bool:
+        """Make sure the page is fetched, returns whether it exists"""
+        if self._prefetch is not None:
+            await self._prefetch
+            self._prefetch = None
+        while index >= len(self.pages) and self.has_next:
+            await self._fetch_next()
+        return index < len(self.pages)
+
+    async def start(self):
+        if not await self._page(0):
+            return await self.ctx.send(embed=self.format_page([], 0))
+        index = 0
+        msg = await self.ctx.send(embed=self.format_page(self.pages[0], 0))
+        if not self.has_next:
+            return
+        self._start_prefetch(index)
+        for emoji in (PREVIOUS, NEXT, STOP):
+            await msg.add_reaction(emoji)
+
+        while True:
+            try:
+                reaction, user = await self.ctx.bot.waiters.wait_for_reaction(
+                    msg.id,
+                    timeout=self.timeout,
+                    user_ids={self.ctx.author.id},
+                    emojis=(PREVIOUS, NEXT, STOP),
+                )
+            except asyncio.TimeoutError:
+                break
+            with contextlib.suppress(Forbidden, NotFound):
+                await msg.remove_reaction(reaction.emoji, user)
+            emoji = str(reaction.emoji)
+            if emoji == STOP:
+                break
+            new_index = index + 1 if emoji == NEXT else index - 1
+            if new_index < 0 or not await self._page(new_index):
+                continue
+            index = new_index
+            await msg.edit(embed=self.format_page(self.pages[index], index))
+            self._start_prefetch(index)
+
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+        with contextlib.suppress(Forbidden, NotFound):
+            await msg.clear_reactions()
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, FrozenSet, Iterable, Optional
+
+
+class PrefixMatcher:
+    """
+    Precompiled matcher for a set of prefixes
+
+    Most messages aren't commands, so the first character of the content is
+    checked against the possible first characters of every prefix before the
+    (case insensitive) regex is ever run
+    """
+
+    __slots__ = ("prefixes", "first_chars", "regex")
+
+    def __init__(self, prefixes: Iterable[str]):
+        self.prefixes = tuple(prefixes)
+        self.first_chars: FrozenSet[str] = frozenset(
+            c
+            for p in self.prefixes
+            for c in (p[0], p[0].lower(), p[0].upper(), p[0].casefold())
+        )
+        self.regex = re.compile(
+            "(" + "|".join(re.escape(p) for p in self.prefixes) + ")", flags=re.I
+        )
+
+    def match(self, content: str) -> Optional[str]:
+        if not content or content[0] not in self.first_chars:
+            return None
+        match = self.regex.match(content)
+        if match is None:
+            return None
+        return match.group(1)
+
+
+class PrefixMatchers:
+    """
+    Cache of prefix matchers keyed by the guild's prefix
+
+    Guilds sharing a prefix share a matcher, so the cache is bounded by the number
+    of distinct custom prefixes rather than the number of guilds
+    """
+
+    def __init__(self):
+        self.bot_id: Optional[int] = None
+        self._matchers: Dict[str, PrefixMatcher] = {}
+
+    def get(self, prefix: str, bot_id: int) -> PrefixMatcher:
+        if bot_id != self.bot_id:
+            # Mention prefixes depend on the bot's ID, only known after login
+            self.bot_id = bot_id
+            self._matchers.clear()
+        matcher = self._matchers.get(prefix)
+        if matcher is None:
+            matcher = self._matchers[prefix] = PrefixMatcher(
+                (prefix, f"<@{bot_id}> ", f"<@!{bot_id}> ")
+            )
+        return matcher
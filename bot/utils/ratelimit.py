@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import Dict, Hashable, Mapping, Optional, Tuple
+
+from discord.ext import commands
+
+# Requests per second and burst size of each external service
+SERVICE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "codingame": (2, 5),
+    # Asks for at most one request a second
+    "crates": (1, 5),
+    # 5000 requests an hour per token
+    "github": (5000 / 3600, 30),
+    "github_stats": (1, 5),
+    "npm": (5, 10),
+    "piston": (5, 5),
+    "pypi": (5, 10),
+    # Anything over 30 a second gets the IP banned
+    "stackexchange": (10, 20),
+}
+
+
+class RateLimited(commands.CommandError):
+    def __init__(self, service: str, retry_after: float):
+        self.service = service
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        return "Too many requests to {}, try again in {:.0f} seconds".format(
+            self.service, self.retry_after
+        )
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        # Set from server hints, no requests are made until then
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a request could be made"""
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self):
+        # May go negative, which queues the request behind earlier ones
+        self.tokens -= 1
+
+
+class ServiceLimiter:
+    """
+    Token bucket per external service (and optionally per key, like a user's token)
+
+    Requests wait for their turn if it's within `max_wait` seconds and are
+    rejected right away otherwise, instead of spending quota on requests that
+    are going to fail. Buckets are also adjusted from the services' own hints.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, Tuple[float, int]] = SERVICE_LIMITS,
+        *,
+        max_wait: float = 5.0,
+        max_buckets: int = 10000,
+    ):
+        self.limits = limits
+        self.max_wait = max_wait
+        self.max_buckets = max_buckets
+        self.buckets: Dict[Tuple[str, Optional[Hashable]], TokenBucket] = {}
+
+    def bucket(self, service: str, key: Hashable = None) -> Optional[TokenBucket]:
+        if service not in self.limits:
+            return None
+        bucket = self.buckets.get((service, key))
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self._prune()
+            bucket = self.buckets[(service, key)] = TokenBucket(*self.limits[service])
+        return bucket
+
+    def _prune(self):
+        # Buckets that refilled completely behave exactly like new ones
+        now = time.monotonic()
+        for k, bucket in list(self.buckets.items()):
+            if bucket.delay(now) == 0 and bucket.tokens >= bucket.capacity:
+                del self.buckets[k]
+
+    async def acquire(self, service: str, key: Hashable = None):
+        bucket = self.bucket(service, key)
+        if bucket is None:
+            return
+        delay = bucket.delay(time.monotonic())
+        if delay > self.max_wait:
+            raise RateLimited(service, delay)
+        bucket.take()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def update(
+        self,
+        service: str,
+        key: Hashable = None,
+        *,
+        remaining: Optional[int] = None,
+        reset_after: Optional[float] = None,
+        backoff: Optional[float] = None,
+    ):
+        bucket = self.bucket(service, key)
+        if bucket is None:
+            return
+        now = time.monotonic()
+        if remaining is not None:
+            bucket._refill(now)
+            bucket.tokens = min(bucket.tokens, remaining)
+            if remaining <= 0 and reset_after is not None:
+                bucket.blocked_until = max(bucket.blocked_until, now + reset_after)
+        if backoff:
+            bucket.blocked_until = max(bucket.blocked_until, now + backoff)
+
+    def update_from_headers(
+        self, service: str, key: Hashable, status: int, headers: Mapping[str, str]
+    ):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        retry_after = headers.get("Retry-After")
+        try:
+            if remaining is not None:
+                self.update(
+                    service,
+                    key,
+                    remaining=int(remaining),
+                    # Unix timestamp of when the quota resets
+                    reset_after=(
+                        None if reset is None else max(int(reset) - time.time(), 0)
+                    ),
+                )
+            if retry_after is not None and status in (403, 429, 503):
+                self.update(service, key, backoff=float(retry_after))
+        except ValueError:
+            pass
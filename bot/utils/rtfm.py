@@ -1,7 +1,14 @@
 import io
+import json
 import os
+import pickle
 import re
+import tempfile
 import zlib
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from bot.utils.fuzzy import FinderIndex
 
 # Directly taken and modified from Rapptz/RoboDanny
 # https://github.com/Rapptz/RoboDanny/blob/715a5cf8545b94d61823f62db484be4fac1c95b1/cogs/api.py
@@ -94,3 +101,136 @@ class SphinxObjectFileReader:
             result[f"{prefix}{key}"] = os.path.join(url, location)
 
         return result
+
+
+# Documentation search targets, the base URL of their docs
+TARGETS = {
+    "python": "https://docs.python.org/3",
+    "discord.py": "https://discordpy.readthedocs.io/en/latest",
+    "numpy": "https://numpy.readthedocs.io/en/latest",
+    "pandas": "https://pandas.pydata.org/docs",
+    "pillow": "https://pillow.readthedocs.io/en/stable",
+    "imageio": "https://imageio.readthedocs.io/en/stable",
+    "requests": "https://requests.readthedocs.io/en/master",
+    "aiohttp": "https://docs.aiohttp.org/en/stable",
+    "django": "https://django.readthedocs.io/en/stable",
+    "flask": "https://flask.palletsprojects.com/en/1.1.x",
+    "praw": "https://praw.readthedocs.io/en/latest",
+    "apraw": "https://apraw.readthedocs.io/en/latest",
+    "asyncpg": "https://magicstack.github.io/asyncpg/current",
+    "aiosqlite": "https://aiosqlite.omnilib.dev/en/latest",
+    "sqlalchemy": "https://docs.sqlalchemy.org/en/14",
+    "tensorflow": "https://www.tensorflow.org/api_docs/python",
+    "matplotlib": "https://matplotlib.org/stable",
+    "seaborn": "https://seaborn.pydata.org",
+    "pygame": "https://www.pygame.org/docs",
+    "simplejson": "https://simplejson.readthedocs.io/en/latest",
+    "wikipedia": "https://wikipedia.readthedocs.io/en/latest",
+}
+
+ALIASES = {
+    ("py", "py3", "python3", "python"): "python",
+    ("dpy", "discord.py", "discordpy"): "discord.py",
+    ("np", "numpy", "num"): "numpy",
+    ("pd", "pandas", "panda"): "pandas",
+    ("pillow", "pil"): "pillow",
+    ("imageio", "imgio", "img"): "imageio",
+    ("requests", "req"): "requests",
+    ("aiohttp", "http"): "aiohttp",
+    ("django", "dj"): "django",
+    ("flask", "fl"): "flask",
+    ("reddit", "praw", "pr"): "praw",
+    ("asyncpraw", "apraw", "apr"): "apraw",
+    ("asyncpg", "pg"): "asyncpg",
+    ("aiosqlite", "sqlite", "sqlite3", "sqli"): "aiosqlite",
+    ("sqlalchemy", "sql", "alchemy", "alchem"): "sqlalchemy",
+    ("tensorflow", "tf"): "tensorflow",
+    ("matplotlib", "mpl", "plt"): "matplotlib",
+    ("seaborn", "sea"): "seaborn",
+    ("pygame", "pyg", "game"): "pygame",
+    ("simplejson", "sjson", "json"): "simplejson",
+    ("wiki", "wikipedia"): "wikipedia",
+}
+
+URL_OVERRIDES = {
+    "tensorflow": "https://github.com/mr-ubik/tensorflow-intersphinx/raw/master/tf2_py_objects.inv"
+}
+
+
+# Bumped when what's pickled changes, older files are then ignored
+CACHE_VERSION = 1
+
+
+class CachedInventory(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    index: FinderIndex
+
+
+class InventoryCache:
+    """
+    Parsed inventories kept on disk with the validators of their response
+
+    Each target has a small JSON file with the ETag and Last-Modified of the
+    objects.inv it was parsed from, to revalidate it with a conditional
+    request, and a pickle of its finder index, which loads in one read with
+    no decompressing, parsing or indexing.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _paths(self, target: str):
+        return (
+            self.directory / f"{target}.json",
+            self.directory / f"{target}.pickle",
+        )
+
+    def load(self, target: str, url: str) -> Optional[CachedInventory]:
+        meta_path, index_path = self._paths(target)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["version"] != CACHE_VERSION or meta["url"] != url:
+                return None
+            with open(index_path, "rb") as f:
+                index = pickle.load(f)
+        except Exception:
+            # Missing, corrupt or outdated, the target is downloaded again and
+            # the files replaced
+            return None
+        return CachedInventory(meta["etag"], meta["last_modified"], index)
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        # Written next to the target and renamed, so a crash can't leave a
+        # partial file behind
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def save(
+        self,
+        target: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        index: FinderIndex,
+    ):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path, index_path = self._paths(target)
+        # The index first, so its metadata never belongs to an older index. At
+        # worst a newer index has older validators and gets downloaded again.
+        self._write(index_path, pickle.dumps(index, pickle.HIGHEST_PROTOCOL))
+        meta = {
+            "version": CACHE_VERSION,
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        self._write(meta_path, json.dumps(meta).encode())
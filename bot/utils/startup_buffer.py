@@ -0,0 +1,34 @@
+from collections import deque
+from typing import Deque, Generic, Iterator, TypeVar
+
+_T = TypeVar("_T")
+
+
+class StartupBuffer(Generic[_T]):
+    """
+    Bounded FIFO holding items that arrive before the bot is ready to handle them
+
+    Items past the limit are shed instead of queued, the number of items shed
+    is kept in `dropped`
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.replayed = 0
+        self._items: Deque[_T] = deque()
+
+    def add(self, item: _T) -> bool:
+        if len(self._items) >= self.maxsize:
+            self.dropped += 1
+            return False
+        self._items.append(item)
+        return True
+
+    def drain(self) -> Iterator[_T]:
+        while self._items:
+            self.replayed += 1
+            yield self._items.popleft()
+
+    def __len__(self) -> int:
+        return len(self._items)
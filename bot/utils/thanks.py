@@ -0,0 +1,453 @@
+import datetime
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from cachetools import TTLCache
+from tortoise import Tortoise
+
+from models import ThankModel
+
+from .cache_backend import CacheBackend
+
+# Leaderboard entries kept in memory per guild, deeper pages are queried
+LEADERBOARD_CACHE_SIZE = 100
+
+# The guild and both users are created if missing in the same statement as the
+# thank itself, which also bumps the thanked user's counters. Foreign keys are
+# only checked at the end of the statement, by which point the rows inserted by
+# the CTEs exist
+RECORD_THANK = """
+with guild_row as (
+    insert into guilds (id, prefix) values ($1, '.') on conflict (id) do nothing
+), user_rows as (
+    insert into users (id) values ($2), ($3) on conflict (id) do nothing
+), counter as (
+    insert into thank_counts (guild_id, user_id, count) values ($1, $3, 1)
+    on conflict (guild_id, user_id) do update set count = thank_counts.count + 1
+), daily_counter as (
+    insert into thank_daily_counts (guild_id, user_id, day, count)
+    values ($1, $3, $6, 1)
+    on conflict (guild_id, user_id, day)
+    do update set count = thank_daily_counts.count + 1
+)
+insert into thanks (guild_id, thanker_id, thanked_id, description, time)
+values ($1, $2, $3, $4, $5)
+returning id
+""".strip()
+
+DELETE_THANK = """
+with deleted as (
+    delete from thanks where id = $1 returning guild_id, thanked_id, time
+), counter as (
+    update thank_counts c set count = c.count - 1
+    from deleted d
+    where c.guild_id = d.guild_id and c.user_id = d.thanked_id
+), daily as (
+    update thank_daily_counts c set count = c.count - 1
+    from deleted d
+    where c.guild_id = d.guild_id and c.user_id = d.thanked_id
+    and c.day = (d.time at time zone 'utc')::date
+)
+select count(*) as deleted from deleted
+""".strip()
+
+# Window count is computed before the limit, so it's the guild's total
+LEADERBOARD = """
+select user_id, count, count(*) over () as total
+from thank_counts
+where guild_id = $1 and count > 0
+order by count desc, user_id
+limit $2 offset $3
+""".strip()
+
+# Sums the daily buckets since the given day, instead of scanning the thanks
+WINDOW_LEADERBOARD = """
+select user_id, sum(count) as count, count(*) over () as total
+from thank_daily_counts
+where guild_id = $1 and day >= $4
+group by user_id
+having sum(count) > 0
+order by count desc, user_id
+limit $2 offset $3
+""".strip()
+
+# Rewrites counters that drifted from the thanks table, returns their guilds.
+# A count is only written back if the row still holds the value read with it:
+# a thank recorded while this runs changes the row, and the update's recheck
+# then skips it until the next run instead of overwriting the increment.
+RECONCILE_COUNTS = """
+with actual as (
+    select c.id, c.count as seen, count(t.id) as count
+    from thank_counts c
+    left join thanks t on t.guild_id = c.guild_id and t.thanked_id = c.user_id
+    group by c.id
+), fixed as (
+    update thank_counts c set count = a.count
+    from actual a
+    where c.id = a.id and c.count = a.seen and a.seen <> a.count
+    returning c.guild_id
+), missing as (
+    insert into thank_counts (guild_id, user_id, count)
+    select t.guild_id, t.thanked_id, count(*)
+    from thanks t
+    where not exists (
+        select 1 from thank_counts c
+        where c.guild_id = t.guild_id and c.user_id = t.thanked_id
+    )
+    group by t.guild_id, t.thanked_id
+    on conflict (guild_id, user_id) do nothing
+    returning guild_id
+)
+select guild_id from fixed
+union
+select guild_id from missing
+""".strip()
+
+# Keyset pagination, the cursor is the (time, id) of the last row of the
+# previous page so any page is a range scan of the thanked_id index
+LIST_RECEIVED = """
+select id, time, thanker_id, description
+from thanks
+where thanked_id = $1 and guild_id = $2
+order by time desc, id desc
+limit $3
+""".strip()
+
+LIST_RECEIVED_AFTER = """
+select id, time, thanker_id, description
+from thanks
+where thanked_id = $1 and guild_id = $2 and (time, id) < ($4, $5)
+order by time desc, id desc
+limit $3
+""".strip()
+
+# Matches the expression of the GIN index on thanks, which the query must use
+# as is for the index to be used
+SEARCH = """
+select
+    id,
+    time,
+    thanker_id,
+    thanked_id,
+    ts_headline(
+        'english', description, query, 'StartSel=**, StopSel=**, HighlightAll=true'
+    ) as headline
+from thanks, websearch_to_tsquery('english', $2) query
+where guild_id = $1 and to_tsvector('english', description) @@ query
+order by ts_rank(to_tsvector('english', description), query) desc, id desc
+limit $3 offset $4
+""".strip()
+
+EXPORT_FIELDS = ("id", "time", "thanker_id", "thanked_id", "description")
+
+EXPORT = """
+select id, time, thanker_id, thanked_id, description
+from thanks
+where guild_id = $1 and id > $2
+order by id
+limit $3
+""".strip()
+
+# Rows fetched by each query of an export
+EXPORT_BATCH_SIZE = 1000
+
+# Same for the daily buckets, which also fills them for thanks older than them,
+# with the same check against concurrent thanks. Emptied buckets are set to 0.
+RECONCILE_DAILY_COUNTS = """
+with actual as (
+    select
+        guild_id,
+        thanked_id as user_id,
+        (time at time zone 'utc')::date as day,
+        count(*) as count
+    from thanks
+    group by guild_id, thanked_id, (time at time zone 'utc')::date
+), drifted as (
+    select c.id, c.count as seen, coalesce(a.count, 0) as count
+    from thank_daily_counts c
+    left join actual a
+    on a.guild_id = c.guild_id and a.user_id = c.user_id and a.day = c.day
+    where c.count <> coalesce(a.count, 0)
+), fixed as (
+    update thank_daily_counts c set count = d.count
+    from drifted d
+    where c.id = d.id and c.count = d.seen
+    returning c.guild_id
+), missing as (
+    insert into thank_daily_counts (guild_id, user_id, day, count)
+    select a.guild_id, a.user_id, a.day, a.count
+    from actual a
+    where not exists (
+        select 1 from thank_daily_counts c
+        where c.guild_id = a.guild_id and c.user_id = a.user_id and c.day = a.day
+    )
+    on conflict (guild_id, user_id, day) do nothing
+    returning guild_id
+)
+select guild_id from fixed
+union
+select guild_id from missing
+""".strip()
+
+# All four counts in one scan of the member's thanks
+THANK_STATS = """
+select
+    count(*) filter (where thanked_id = $1) as received,
+    count(*) filter (where thanker_id = $1) as sent,
+    count(*) filter (where thanked_id = $1 and guild_id = $2) as guild_received,
+    count(*) filter (where thanker_id = $1 and guild_id = $2) as guild_sent
+from thanks
+where thanked_id = $1 or thanker_id = $1
+""".strip()
+
+
+class ThankStats(NamedTuple):
+    received: int
+    sent: int
+    guild_received: int
+    guild_sent: int
+
+
+class ThankEntry(NamedTuple):
+    id: int
+    time: datetime.datetime
+    thanker_id: int
+    description: str
+
+
+ThankCursor = Tuple[datetime.datetime, int]
+
+
+class SearchResult(NamedTuple):
+    id: int
+    time: datetime.datetime
+    thanker_id: int
+    thanked_id: int
+    headline: str
+
+
+class LeaderboardEntry(NamedTuple):
+    user_id: int
+    count: int
+
+
+class Leaderboard(NamedTuple):
+    total: int
+    entries: List[LeaderboardEntry]
+
+
+async def record_thank(
+    guild_id: int, thanker_id: int, thanked_id: int, description: str
+) -> int:
+    """Record a thank in a single round trip, returns its id"""
+    conn = Tortoise.get_connection("default")
+    # Days are in UTC like the thank times
+    now = datetime.datetime.utcnow()
+    rows = await conn.execute_query_dict(
+        RECORD_THANK,
+        [guild_id, thanker_id, thanked_id, description, now, now.date()],
+    )
+    return rows[0]["id"]
+
+
+class ThankStore:
+    """
+    Records and deletes thanks, and caches members' thank stats
+
+    Stats are cached per member and guild, and dropped for every guild of both
+    members whenever a thank between them is recorded or deleted since the
+    global counts change too.
+
+    Thanks received are also counted per guild and user in thank_counts, the
+    top of each guild's leaderboard is kept in memory and updated in place.
+    A guild is only served by the cluster running its shard, so this cache
+    doesn't need to be shared, only invalidated when reconciling repairs
+    counts from another cluster.
+    """
+
+    namespace = "thank_stats"
+    leaderboard_namespace = "thank_leaderboards"
+
+    def __init__(self, cache: CacheBackend):
+        self.cache = cache
+        cache.add_namespace(self.namespace, maxsize=10000, ttl=3600)
+        cache.subscribe(self.leaderboard_namespace, self._drop_leaderboard)
+        self._leaderboards: TTLCache = TTLCache(maxsize=1000, ttl=3600)
+
+    def _drop_leaderboard(self, guild_id: int):
+        self._leaderboards.pop(guild_id, None)
+
+    async def record(
+        self, guild_id: int, thanker_id: int, thanked_id: int, description: str
+    ) -> int:
+        thank_id = await record_thank(guild_id, thanker_id, thanked_id, description)
+        await self._invalidate(thanker_id, thanked_id)
+        self._bump(guild_id, thanked_id, 1)
+        return thank_id
+
+    async def delete(self, thank: ThankModel) -> bool:
+        """Delete a thank, returns whether it was still there to delete"""
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(DELETE_THANK, [thank.id])
+        # Someone else deleted it first, the counts were already updated
+        if not rows[0]["deleted"]:
+            return False
+        await self._invalidate(thank.thanker_id, thank.thanked_id)
+        self._bump(thank.guild_id, thank.thanked_id, -1)
+        return True
+
+    async def stats(self, guild_id: int, member_id: int) -> ThankStats:
+        cached: Optional[Dict[int, ThankStats]] = await self.cache.get(
+            self.namespace, member_id
+        )
+        if cached is not None and guild_id in cached:
+            return cached[guild_id]
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(THANK_STATS, [member_id, guild_id])
+        stats = ThankStats(**rows[0])
+        cached = cached or {}
+        cached[guild_id] = stats
+        await self.cache.set(self.namespace, member_id, cached)
+        return stats
+
+    async def _invalidate(self, *member_ids: int):
+        for member_id in member_ids:
+            await self.cache.invalidate(self.namespace, member_id)
+
+    async def list_received(
+        self,
+        guild_id: int,
+        member_id: int,
+        cursor: Optional[ThankCursor],
+        limit: int,
+    ) -> Tuple[List[ThankEntry], Optional[ThankCursor]]:
+        """A page of the thanks received, newest first, and the next page's cursor"""
+        conn = Tortoise.get_connection("default")
+        # One more row than needed tells whether there's a next page
+        if cursor is None:
+            rows = await conn.execute_query_dict(
+                LIST_RECEIVED, [member_id, guild_id, limit + 1]
+            )
+        else:
+            rows = await conn.execute_query_dict(
+                LIST_RECEIVED_AFTER, [member_id, guild_id, limit + 1, *cursor]
+            )
+        entries = [ThankEntry(**row) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return entries, None
+        return entries, (entries[-1].time, entries[-1].id)
+
+    async def search(
+        self, guild_id: int, terms: str, offset: int, limit: int
+    ) -> Tuple[List[SearchResult], Optional[int]]:
+        """A page of the guild's thanks matching the terms, best match first"""
+        conn = Tortoise.get_connection("default")
+        # Ranked results can't be paged by a key, but pages are rarely deep
+        rows = await conn.execute_query_dict(
+            SEARCH, [guild_id, terms, limit + 1, offset]
+        )
+        results = [SearchResult(**row) for row in rows[:limit]]
+        return results, offset + limit if len(rows) > limit else None
+
+    async def export(self, guild_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        All the thanks of a guild, fetched in batches by id
+
+        Each batch is its own query, so no connection or transaction is held
+        while the caller uploads what it made of the previous rows.
+        """
+        conn = Tortoise.get_connection("default")
+        last_id = 0
+        while True:
+            rows = await conn.execute_query_dict(
+                EXPORT, [guild_id, last_id, EXPORT_BATCH_SIZE]
+            )
+            for row in rows:
+                yield row
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+            last_id = rows[-1]["id"]
+
+    async def leaderboard(
+        self,
+        guild_id: int,
+        offset: int,
+        limit: int,
+        *,
+        since: Optional[datetime.date] = None,
+    ) -> Leaderboard:
+        """Leaderboard of all time, or of the thanks received since the given day"""
+        if since is not None:
+            return await self._fetch_leaderboard(guild_id, offset, limit, since)
+        if offset + limit <= LEADERBOARD_CACHE_SIZE:
+            top = self._leaderboards.get(guild_id)
+            if top is None:
+                top = self._leaderboards[guild_id] = await self._fetch_leaderboard(
+                    guild_id, 0, LEADERBOARD_CACHE_SIZE
+                )
+            return Leaderboard(top.total, top.entries[offset : offset + limit])
+        return await self._fetch_leaderboard(guild_id, offset, limit)
+
+    async def _fetch_leaderboard(
+        self,
+        guild_id: int,
+        offset: int,
+        limit: int,
+        since: Optional[datetime.date] = None,
+    ) -> Leaderboard:
+        conn = Tortoise.get_connection("default")
+        if since is None:
+            rows = await conn.execute_query_dict(LEADERBOARD, [guild_id, limit, offset])
+        else:
+            rows = await conn.execute_query_dict(
+                WINDOW_LEADERBOARD, [guild_id, limit, offset, since]
+            )
+        if not rows and offset:
+            # Past the end, only the total is needed
+            total = (await self._fetch_leaderboard(guild_id, 0, 1, since)).total
+            return Leaderboard(total, [])
+        return Leaderboard(
+            rows[0]["total"] if rows else 0,
+            [LeaderboardEntry(row["user_id"], row["count"]) for row in rows],
+        )
+
+    def _bump(self, guild_id: int, user_id: int, delta: int):
+        top: Optional[Leaderboard] = self._leaderboards.get(guild_id)
+        if top is None:
+            return
+        entries, total = top.entries, top.total
+        # Whether every user of the guild with thanks is cached
+        complete = total == len(entries)
+        index = next((i for i, e in enumerate(entries) if e.user_id == user_id), None)
+        if index is None:
+            # Only known to have had no thanks if the cache is complete
+            if not complete or delta < 0:
+                del self._leaderboards[guild_id]
+                return
+            entries.append(LeaderboardEntry(user_id, delta))
+            total += 1
+        else:
+            count = entries[index].count + delta
+            if not complete and count <= entries[-1].count:
+                # Someone outside the cached part may now rank higher, or tie
+                # and come first by user id
+                del self._leaderboards[guild_id]
+                return
+            if count > 0:
+                entries[index] = LeaderboardEntry(user_id, count)
+            else:
+                del entries[index]
+                total -= 1
+        entries.sort(key=lambda e: (-e.count, e.user_id))
+        del entries[LEADERBOARD_CACHE_SIZE:]
+        self._leaderboards[guild_id] = Leaderboard(total, entries)
+
+    async def reconcile(self) -> Set[int]:
+        """Repair counters that drifted from the thanks table, returns their guilds"""
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(RECONCILE_COUNTS)
+        rows += await conn.execute_query_dict(RECONCILE_DAILY_COUNTS)
+        guild_ids = {row["guild_id"] for row in rows}
+        for guild_id in guild_ids:
+            # The guild may be served by another cluster
+            await self.cache.invalidate(self.leaderboard_namespace, guild_id)
+        return guild_ids
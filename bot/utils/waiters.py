@@ -0,0 +1,117 @@
+import asyncio
+import contextlib
+from typing import Any, Callable, Collection, Dict, Hashable, List, Optional, Tuple
+
+from discord import Message, Reaction, User
+
+# Prompts are for people, nothing should wait longer than this
+MAX_TIMEOUT = 900
+
+
+class _Waiter:
+    __slots__ = ("future", "predicate")
+
+    def __init__(self, future: asyncio.Future, predicate: Callable[..., bool]):
+        self.future = future
+        self.predicate = predicate
+
+
+class WaiterRegistry:
+    """
+    Replacement for `bot.wait_for` for reactions and messages
+
+    discord.py runs the check of every waiter on every event of its type.
+    Waiters here are indexed by the message they wait for reactions on, or the
+    channel (and author) they wait for messages in, so an event only runs the
+    checks of waiters interested in it. Every wait needs a timeout, so an
+    abandoned prompt can't stay registered forever.
+    """
+
+    def __init__(self, *, max_timeout: float = MAX_TIMEOUT):
+        self.max_timeout = max_timeout
+        self._reactions: Dict[int, List[_Waiter]] = {}
+        self._messages: Dict[Tuple[int, Optional[int]], List[_Waiter]] = {}
+
+    async def _wait(
+        self,
+        index: Dict[Any, List[_Waiter]],
+        key: Hashable,
+        predicate: Callable[..., bool],
+        timeout: float,
+    ):
+        if not 0 < timeout <= self.max_timeout:
+            raise ValueError(f"Timeout must be within 0 and {self.max_timeout}")
+        waiter = _Waiter(asyncio.get_event_loop().create_future(), predicate)
+        index.setdefault(key, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        finally:
+            waiters = index.get(key)
+            if waiters is not None:
+                with contextlib.suppress(ValueError):
+                    waiters.remove(waiter)
+                if not waiters:
+                    del index[key]
+
+    @staticmethod
+    def _resolve(index: Dict[Any, List[_Waiter]], key: Hashable, *args):
+        for waiter in index.get(key, ()):
+            if waiter.future.done():
+                continue
+            try:
+                if waiter.predicate(*args):
+                    waiter.future.set_result(args)
+            except Exception as e:
+                waiter.future.set_exception(e)
+
+    async def wait_for_reaction(
+        self,
+        message_id: int,
+        *,
+        timeout: float,
+        user_ids: Optional[Collection[int]] = None,
+        emojis: Optional[Collection[str]] = None,
+    ) -> Tuple[Reaction, User]:
+        """
+        Wait for a reaction on a message, by one of `user_ids` and with one of
+        `emojis` if given. Raises asyncio.TimeoutError like `bot.wait_for`
+        """
+
+        def predicate(reaction: Reaction, user: User) -> bool:
+            return (user_ids is None or user.id in user_ids) and (
+                emojis is None or str(reaction.emoji) in emojis
+            )
+
+        return await self._wait(self._reactions, message_id, predicate, timeout)
+
+    async def wait_for_message(
+        self,
+        channel_id: int,
+        *,
+        timeout: float,
+        author_id: Optional[int] = None,
+        check: Optional[Callable[[Message], bool]] = None,
+    ) -> Message:
+        """Wait for a message in a channel, by the given author if any"""
+        (message,) = await self._wait(
+            self._messages,
+            (channel_id, author_id),
+            check or (lambda _: True),
+            timeout,
+        )
+        return message
+
+    def dispatch_reaction(self, reaction: Reaction, user: User):
+        self._resolve(self._reactions, reaction.message.id, reaction, user)
+
+    def dispatch_message(self, message: Message):
+        channel_id = message.channel.id
+        self._resolve(self._messages, (channel_id, message.author.id), message)
+        self._resolve(self._messages, (channel_id, None), message)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of live waiters by event"""
+        return {
+            "reaction": sum(map(len, self._reactions.values())),
+            "message": sum(map(len, self._messages.values())),
+        }
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseSettings
 
 
@@ -5,6 +7,20 @@ class BotConfig(BaseSettings):
     bot_token: str
     quiz_api_token: str
     log_webhook: str
+    startup_buffer_size: int = 500
+    error_report_interval: float = 5.0
+    lazy_extensions: bool = False
+    # Messages kept in cache, reaction/edit events only fire for cached ones
+    max_messages: int = 200
+    # Set per process by the cluster launcher, None lets discord decide
+    shard_count: Optional[int] = None
+    shard_ids: Optional[List[int]] = None
+    cluster_id: int = 0
+    cluster_count: int = 1
+    # "memory" for a single process, "postgres" to share invalidations
+    cache_backend: str = "memory"
+    # Parsed RTFM inventories, on a volume to survive deploys
+    rtfm_cache_dir: str = "cache/rtfm"
 
     class Config:
         env_file = ".env"
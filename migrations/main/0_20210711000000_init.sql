@@ -0,0 +1,50 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "guilds" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "prefix" VARCHAR(10) NOT NULL  DEFAULT '.'
+);
+COMMENT ON COLUMN "guilds"."id" IS 'Discord ID of the guild';
+COMMENT ON COLUMN "guilds"."prefix" IS 'Custom prefix of the guild';
+COMMENT ON TABLE "guilds" IS 'Represents a discord guild''s settings';
+CREATE TABLE IF NOT EXISTS "users" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "github_oauth_token" VARCHAR(50),
+    "stackoverflow_oauth_token" VARCHAR(50)
+);
+COMMENT ON COLUMN "users"."id" IS 'Discord ID of the user';
+COMMENT ON COLUMN "users"."github_oauth_token" IS 'Github OAuth2 access token of the user';
+COMMENT ON COLUMN "users"."stackoverflow_oauth_token" IS 'Stackoverflow OAuth2 access token of the user';
+COMMENT ON TABLE "users" IS 'Represents all users';
+CREATE TABLE IF NOT EXISTS "jokes" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "setup" VARCHAR(150) NOT NULL,
+    "end" VARCHAR(150) NOT NULL,
+    "tags" JSONB NOT NULL,
+    "accepted" BOOL NOT NULL  DEFAULT False,
+    "creator_id" BIGINT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+COMMENT ON COLUMN "jokes"."id" IS 'Joke ID';
+COMMENT ON COLUMN "jokes"."setup" IS 'Joke setup';
+COMMENT ON COLUMN "jokes"."end" IS 'Joke end';
+COMMENT ON COLUMN "jokes"."tags" IS 'List of tags';
+COMMENT ON COLUMN "jokes"."accepted" IS 'Whether the joke has been accepted in';
+COMMENT ON COLUMN "jokes"."creator_id" IS 'User who submitted this Joke';
+COMMENT ON TABLE "jokes" IS 'User submitted jokes being collected';
+CREATE TABLE IF NOT EXISTS "thanks" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "time" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "description" VARCHAR(100) NOT NULL,
+    "thanked_id" BIGINT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    "guild_id" BIGINT NOT NULL REFERENCES "guilds" ("id") ON DELETE CASCADE,
+    "thanker_id" BIGINT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+COMMENT ON COLUMN "thanks"."thanked_id" IS 'The member who was thanked';
+COMMENT ON COLUMN "thanks"."guild_id" IS 'Guild in which the user was thanked';
+COMMENT ON COLUMN "thanks"."thanker_id" IS 'The member who sent the thanks';
+COMMENT ON TABLE "thanks" IS 'Represents a ''thank'' given from one user to another';
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(20) NOT NULL,
+    "content" JSONB NOT NULL
+);
@@ -0,0 +1,14 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "thank_counts" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "count" INT NOT NULL  DEFAULT 0,
+    "user_id" BIGINT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    "guild_id" BIGINT NOT NULL REFERENCES "guilds" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_thank_count_guild_i_bd0bd0" UNIQUE ("guild_id", "user_id")
+);
+COMMENT ON COLUMN "thank_counts"."count" IS 'Number of thanks received';
+COMMENT ON COLUMN "thank_counts"."user_id" IS 'The member who was thanked';
+COMMENT ON COLUMN "thank_counts"."guild_id" IS 'Guild in which the thanks were received';
+COMMENT ON TABLE "thank_counts" IS 'Thanks received per user and guild, kept alongside ''thanks''';
+-- downgrade --
+DROP TABLE IF EXISTS "thank_counts";
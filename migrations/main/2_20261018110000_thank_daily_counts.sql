@@ -0,0 +1,16 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "thank_daily_counts" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "day" DATE NOT NULL,
+    "count" INT NOT NULL  DEFAULT 0,
+    "user_id" BIGINT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    "guild_id" BIGINT NOT NULL REFERENCES "guilds" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_thank_daily_guild_i_ad839f" UNIQUE ("guild_id", "user_id", "day")
+);
+COMMENT ON COLUMN "thank_daily_counts"."day" IS 'UTC day the thanks were received on';
+COMMENT ON COLUMN "thank_daily_counts"."count" IS 'Number of thanks received';
+COMMENT ON COLUMN "thank_daily_counts"."user_id" IS 'The member who was thanked';
+COMMENT ON COLUMN "thank_daily_counts"."guild_id" IS 'Guild in which the thanks were received';
+COMMENT ON TABLE "thank_daily_counts" IS 'Thanks received per user and guild in each day';
+-- downgrade --
+DROP TABLE IF EXISTS "thank_daily_counts";
@@ -0,0 +1,10 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_thank_daily_guild_i_35bbc6" ON "thank_daily_counts" ("guild_id", "day");
+CREATE INDEX IF NOT EXISTS "idx_thank_counts_leaderboard" ON "thank_counts" ("guild_id", "count" DESC, "user_id");
+CREATE INDEX IF NOT EXISTS "idx_thanks_thanked_80dba8" ON "thanks" ("thanked_id", "guild_id", "time", "id");
+CREATE INDEX IF NOT EXISTS "idx_thanks_thanker_962db8" ON "thanks" ("thanker_id", "guild_id");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_thank_daily_guild_i_35bbc6";
+DROP INDEX IF EXISTS "idx_thank_counts_leaderboard";
+DROP INDEX IF EXISTS "idx_thanks_thanker_962db8";
+DROP INDEX IF EXISTS "idx_thanks_thanked_80dba8";
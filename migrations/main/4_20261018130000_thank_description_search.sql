@@ -0,0 +1,4 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_thanks_description_tsv" ON "thanks" USING GIN (to_tsvector('english', "description"));
+-- downgrade --
+DROP INDEX IF EXISTS "idx_thanks_description_tsv";
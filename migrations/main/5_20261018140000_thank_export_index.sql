@@ -0,0 +1,4 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_thanks_guild_i_430197" ON "thanks" ("guild_id", "id");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_thanks_guild_i_430197";
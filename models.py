@@ -24,6 +24,59 @@ class ThankModel(Model):
     class Meta:
         table = "thanks"
         table_description = "Represents a 'thank' given from one user to another"
+        indexes = (
+            # Thanks received in a guild, newest first
+            ("thanked", "guild", "time", "id"),
+            ("thanker", "guild"),
+            # Exports of a guild, in batches by id
+            ("guild", "id"),
+        )
+
+
+class ThankCountModel(Model):
+    id = fields.IntField(pk=True)
+    guild = fields.ForeignKeyField(
+        model_name="main.GuildModel",
+        related_name="thank_counts",
+        description="Guild in which the thanks were received",
+    )
+    user = fields.ForeignKeyField(
+        model_name="main.UserModel",
+        related_name="thank_counts",
+        description="The member who was thanked",
+    )
+    count = fields.IntField(default=0, description="Number of thanks received")
+
+    class Meta:
+        table = "thank_counts"
+        table_description = (
+            "Thanks received per user and guild, kept alongside 'thanks'"
+        )
+        unique_together = (("guild", "user"),)
+        # The leaderboard index, (guild_id, count DESC, user_id), is created
+        # by the thank_indexes migration, Meta.indexes can't express DESC
+
+
+class ThankDailyCountModel(Model):
+    id = fields.IntField(pk=True)
+    guild = fields.ForeignKeyField(
+        model_name="main.GuildModel",
+        related_name="thank_daily_counts",
+        description="Guild in which the thanks were received",
+    )
+    user = fields.ForeignKeyField(
+        model_name="main.UserModel",
+        related_name="thank_daily_counts",
+        description="The member who was thanked",
+    )
+    day = fields.DateField(description="UTC day the thanks were received on")
+    count = fields.IntField(default=0, description="Number of thanks received")
+
+    class Meta:
+        table = "thank_daily_counts"
+        table_description = "Thanks received per user and guild in each day"
+        unique_together = (("guild", "user", "day"),)
+        indexes = (("guild", "day"),)
 
 
 class GuildModel(Model):
@@ -0,0 +1,42 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+
+from bot.utils.export import CompressedExport
+
+FIELDS = ("id", "time", "description")
+
+
+def rows(count):
+    for i in range(count):
+        yield {
+            "id": i,
+            "time": datetime.datetime(2021, 7, 11, 12, 0, i % 60),
+            "description": f"thanks for the help {i} " * 3,
+        }
+
+
+def read(part):
+    return gzip.decompress(part.fp.getvalue()).decode()
+
+
+def test_single_part_csv():
+    export = CompressedExport("thanks", "csv", FIELDS, max_size=8 * 1024**2)
+    assert all(export.write(row) is None for row in rows(10))
+    part = export.finish()
+    assert part.filename == "thanks-1.csv.gz"
+    lines = list(csv.DictReader(io.StringIO(read(part))))
+    assert [int(line["id"]) for line in lines] == list(range(10))
+    assert export.parts == 1 and export.rows == 10
+
+
+def test_parts_split_jsonl():
+    # Small enough that the margin leaves half of it for each part
+    export = CompressedExport("thanks", "jsonl", FIELDS, max_size=16 * 1024)
+    parts = [part for part in map(export.write, rows(5000)) if part is not None]
+    parts.append(export.finish())
+    assert len(parts) == export.parts > 1
+    ids = [json.loads(line)["id"] for p in parts for line in read(p).splitlines()]
+    assert ids == list(range(5000))
@@ -0,0 +1,19 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot.utils.extensions import ExtensionLoader
+from bot.utils.metrics import CommandMetrics
+
+
+def test_lazy_stubs_are_not_counted():
+    bot = SimpleNamespace(add_command=lambda command: None)
+    stub = ExtensionLoader(bot)._make_stub("bot.cogs.thank", "thank")
+    metrics = CommandMetrics()
+    ctx = SimpleNamespace(command=stub, command_failed=False)
+
+    async def invoke():
+        await metrics.before_invoke(ctx)
+        await metrics.after_invoke(ctx)
+
+    asyncio.run(invoke())
+    assert metrics.commands == {}
@@ -0,0 +1,162 @@
+import pickle
+import random
+
+import pytest
+
+from bot.utils import fuzzy
+
+SCORERS = [
+    fuzzy.ratio,
+    fuzzy.quick_ratio,
+    fuzzy.partial_ratio,
+    fuzzy.token_sort_ratio,
+    fuzzy.quick_token_sort_ratio,
+    fuzzy.partial_token_sort_ratio,
+]
+
+
+def make_corpus(size, seed=0):
+    # Dotted names made of a few repeated words, like inventory keys
+    rng = random.Random(seed)
+    syllables = [a + b for a in "bcdfgklmnprst" for b in "aeiou"]
+    words = ["".join(rng.sample(syllables, rng.randint(1, 3))) for _ in range(40)]
+    corpus = []
+    for _ in range(size):
+        parts = [rng.choice(words) for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.3:
+            parts[-1] = parts[-1].capitalize()
+        corpus.append(".".join(parts))
+    return corpus
+
+
+def make_queries(corpus, count, seed=0):
+    # Fragments of entries and entries with characters left out
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        entry = rng.choice(corpus)
+        if rng.random() < 0.5:
+            start = rng.randrange(len(entry))
+            query = entry[start : start + rng.randint(3, 12)]
+        else:
+            query = "".join(c for c in entry if rng.random() < 0.7)
+        queries.append(query or entry)
+    return queries
+
+
+CORPUS = make_corpus(200) + [
+    "discord.ext.commands.Bot",
+    "discord.ext.commands.Bot.add_cog",
+    "label:commands intro",
+    # Long enough for difflib to ignore its popular characters
+    ".".join(["commands"] * 30),
+    "",
+]
+QUERIES = make_queries(CORPUS[:-1], 10) + ["bot add cog", "commands", ""]
+
+
+def scalar_scores(query, scorer):
+    return [(key, scorer(query, key)) for key in CORPUS]
+
+
+@pytest.mark.parametrize("scorer", SCORERS, ids=lambda s: s.__name__)
+def test_batched_scores_match_scalar(scorer):
+    choices = fuzzy.ChoiceSet(CORPUS)
+    for query in QUERIES:
+        batched = fuzzy.extract(query, choices, scorer=scorer, limit=None)
+        assert sorted(batched) == sorted(scalar_scores(query, scorer))
+
+
+@pytest.mark.parametrize("scorer", SCORERS, ids=lambda s: s.__name__)
+@pytest.mark.parametrize("score_cutoff", [0, 60])
+def test_batched_top_matches_scalar(scorer, score_cutoff):
+    choices = fuzzy.ChoiceSet(CORPUS)
+    for query in QUERIES:
+        scalar = [s for s in scalar_scores(query, scorer) if s[1] >= score_cutoff]
+        # nlargest is stable, earlier choices win ties
+        expected = sorted(scalar, key=lambda s: s[1], reverse=True)[:5]
+        assert (
+            fuzzy.extract(
+                query, choices, scorer=scorer, score_cutoff=score_cutoff, limit=5
+            )
+            == expected
+        )
+        assert fuzzy.extract_one(
+            query, choices, scorer=scorer, score_cutoff=score_cutoff
+        ) == (expected[0] if expected else None)
+
+
+def test_mapping_choices_keep_values():
+    rng = random.Random(0)
+    mapping = {key: rng.random() for key in CORPUS[:100]}
+    for query in QUERIES:
+        scores = [(k, fuzzy.ratio(query, k), v) for k, v in mapping.items()]
+        expected = sorted(scores, key=lambda s: s[1], reverse=True)[:3]
+        batched = fuzzy.extract(
+            query, fuzzy.ChoiceSet(mapping), scorer=fuzzy.ratio, limit=3
+        )
+        assert batched == expected
+
+
+# Repeated and non-ASCII characters, and characters a case-insensitive regex
+# matches with ASCII ones like the long s and the Kelvin sign
+FINDER_CORPUS = CORPUS[:-2] + [
+    "aaa.baaaa.aa",
+    "Mississippi.sss",
+    "ſtraße.ſsss",
+    "café.Naïve.résumé",
+    "Kelvin.kilo",
+    "ÉCOLE.école",
+    "日本語.docs",
+]
+FINDER_QUERIES = QUERIES + [
+    "aaaa",
+    "sssss",
+    "SSIS",
+    "straß",
+    "café",
+    "resume",
+    "kelvin",
+    "école",
+    "日本",
+    "a.b",
+    "zzz",
+]
+
+
+def finder_results(collection, query, limit, key=None):
+    return fuzzy.finder(query, collection, key=key, lazy=False, limit=limit)
+
+
+@pytest.mark.parametrize("limit", [None, 1, 5])
+def test_finder_index_matches_finder(limit):
+    index = fuzzy.FinderIndex(FINDER_CORPUS)
+    for query in FINDER_QUERIES:
+        assert index.search(query, limit=limit) == finder_results(
+            FINDER_CORPUS, query, limit
+        )
+
+
+def test_finder_index_with_key():
+    pairs = [(name, f"https://docs/{i}") for i, name in enumerate(FINDER_CORPUS)]
+    key = lambda pair: pair[0]
+    index = fuzzy.FinderIndex(pairs, key=key)
+    for query in FINDER_QUERIES:
+        assert index.search(query, limit=8) == finder_results(pairs, query, 8, key)
+        assert index.find(query) == fuzzy.find(query, pairs, key=key)
+
+
+def test_finder_index_add():
+    half = len(FINDER_CORPUS) // 2
+    index = fuzzy.FinderIndex(FINDER_CORPUS[:half])
+    for item in FINDER_CORPUS[half:]:
+        index.add(item)
+    assert len(index) == len(FINDER_CORPUS)
+    for query in FINDER_QUERIES:
+        assert index.search(query) == finder_results(FINDER_CORPUS, query, None)
+
+
+def test_finder_index_pickle():
+    index = pickle.loads(pickle.dumps(fuzzy.FinderIndex(FINDER_CORPUS)))
+    for query in FINDER_QUERIES:
+        assert index.search(query, limit=5) == finder_results(FINDER_CORPUS, query, 5)
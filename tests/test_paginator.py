@@ -0,0 +1,67 @@
+import asyncio
+
+from bot.utils.paginator import ReactionPaginator
+
+
+class FakeMessage:
+    def __init__(self):
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+
+class FakeContext:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, *, embed):
+        self.sent.append(embed)
+        return FakeMessage()
+
+
+def pages_fetcher(pages):
+    async def fetch(cursor):
+        index = cursor or 0
+        if index >= len(pages):
+            return [], None
+        return pages[index], index + 1 if index + 1 < len(pages) else None
+
+    return fetch
+
+
+def test_empty_first_page():
+    ctx = FakeContext()
+    paginator = ReactionPaginator(
+        ctx, pages_fetcher([]), lambda items, index: ("page", items, index)
+    )
+    asyncio.run(paginator.start())
+    assert ctx.sent == [("page", [], 0)]
+    assert paginator.exhausted
+    assert paginator.pages == []
+
+
+def test_single_page_adds_no_reactions():
+    ctx = FakeContext()
+    paginator = ReactionPaginator(
+        ctx, pages_fetcher([[1, 2]]), lambda items, index: ("page", items, index)
+    )
+    asyncio.run(paginator.start())
+    assert ctx.sent == [("page", [1, 2], 0)]
+    assert not paginator.has_next
+
+
+def test_last_page_exactly_full():
+    # A fetcher that can't tell the page it returned was the last one
+    async def fetch(cursor):
+        return ([1, 2], 1) if cursor is None else ([], None)
+
+    paginator = ReactionPaginator(FakeContext(), fetch, lambda items, index: None)
+
+    async def visit():
+        assert await paginator._page(0)
+        assert not await paginator._page(1)
+
+    asyncio.run(visit())
+    assert paginator.exhausted
+    assert paginator.cursors == [None]